@@ -0,0 +1,61 @@
+"""index users email and role
+
+Revision ID: d8666977bb62
+Revises: 17fbf664d382
+Create Date: 2026-10-18 12:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8666977bb62'
+down_revision: Union[str, Sequence[str], None] = '17fbf664d382'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def has_unique_email_index(inspector) -> bool:
+    for index in inspector.get_indexes('users'):
+        if index['column_names'] == ['email'] and index.get('unique'):
+            return True
+    return any(
+        constraint['column_names'] == ['email']
+        for constraint in inspector.get_unique_constraints('users')
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+
+    # init_database.py declares email UNIQUE, but tables created before that
+    # may not have it; signup relies on the constraint to reject duplicates
+    if not has_unique_email_index(inspector):
+        op.execute("""
+ALTER TABLE users
+ADD UNIQUE INDEX uq_users_email (email)
+""")
+
+    op.execute("""
+ALTER TABLE users
+ADD INDEX ix_users_role (role)
+""")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("""
+ALTER TABLE users
+DROP INDEX ix_users_role
+""")
+
+    index_names = {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('users')}
+    if 'uq_users_email' in index_names:
+        op.execute("""
+ALTER TABLE users
+DROP INDEX uq_users_email
+""")
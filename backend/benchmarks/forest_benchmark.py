@@ -0,0 +1,66 @@
+"""
+Inference microbenchmark: scikit-learn predict_proba vs the compiled forest.
+
+Loads the pickled bundle written by controller/model.py, flattens its forest
+with compile_forest, checks that both produce identical probabilities on the
+dataset, then times single-row and batch calls for each.
+
+    python benchmarks/forest_benchmark.py --batch-sizes 1 10 100 1000
+"""
+import argparse
+import os
+import pickle
+import sys
+import time
+import numpy as np
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from controller.forest import CompiledForest, compile_forest
+from controller.preprocess import read_dataset_chunks, transform_chunks
+
+
+def time_call(func, X, repeat):
+    func(X)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(X)
+        timings.append(time.perf_counter() - start)
+    return np.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare sklearn and compiled forest inference latency")
+    parser.add_argument('--model', default=os.path.join(backend_dir, 'stroke_model.pkl'))
+    parser.add_argument('--dataset', default=os.path.join(backend_dir, 'dataset.csv'))
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    with open(args.model, 'rb') as f:
+        artifact = pickle.load(f)
+    model = artifact['model']
+    # Match the server, which pins n_jobs to 1 for request-sized inputs
+    model.n_jobs = 1
+    forest = CompiledForest(compile_forest(model))
+
+    X, _ = transform_chunks(read_dataset_chunks(args.dataset), artifact['preprocessor'])
+    expected = model.predict_proba(X)
+    actual = forest.predict_proba(X)
+    print(f"Checked {len(X)} rows: identical={np.array_equal(expected, actual)} "
+          f"max_abs_diff={np.abs(expected - actual).max():.3g}")
+    print(f"Forest: {forest.n_estimators} trees, {len(forest.feature)} nodes, depth {forest.max_depth}\n")
+
+    print(f"{'batch':>6} {'sklearn':>12} {'compiled':>12} {'speedup':>8}")
+    for batch_size in args.batch_sizes:
+        batch = X[:batch_size]
+        sklearn_time = time_call(model.predict_proba, batch, args.repeat)
+        compiled_time = time_call(forest.predict_proba, batch, args.repeat)
+        print(f"{batch_size:>6} {sklearn_time * 1000:>10.3f}ms {compiled_time * 1000:>10.3f}ms "
+              f"{sklearn_time / compiled_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Concurrent load benchmark for a running API server.
+
+Fires --requests calls at --path with --concurrency in flight, and probes
+/health in parallel. A handler that blocks the event loop shows up as a
+large /health latency under load, not only as lower throughput. Run it
+against the server before and after a change to compare.
+
+    python benchmarks/load_benchmark.py --method POST --path /prediction/predict --token <jwt> \
+        --body '{"gender": "Male", "age": 67, ...}' --concurrency 32 --requests 500
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import httpx
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(name, latencies, elapsed=None):
+    line = (f"{name:<10} n={len(latencies):<6} "
+            f"p50={percentile(latencies, 50) * 1000:8.1f}ms "
+            f"p95={percentile(latencies, 95) * 1000:8.1f}ms "
+            f"p99={percentile(latencies, 99) * 1000:8.1f}ms")
+    if elapsed:
+        line += f"  throughput={len(latencies) / elapsed:8.1f} req/s"
+    print(line)
+
+
+async def run_load(client, args, headers, body):
+    latencies = []
+    statuses = {}
+    remaining = iter(range(args.requests))
+
+    async def worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            if body is None:
+                response = await client.request(args.method, args.path, headers=headers)
+            else:
+                response = await client.request(args.method, args.path, headers=headers, json=body)
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    return latencies, statuses
+
+
+async def probe_health(client, stop_event, interval):
+    latencies = []
+    while not stop_event.is_set():
+        start = time.perf_counter()
+        await client.get('/health')
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def main(args):
+    headers = {'Authorization': f'Bearer {args.token}'} if args.token else {}
+    body = json.loads(args.body) if args.body else None
+    limits = httpx.Limits(max_connections=args.concurrency + 1)
+
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+        stop_event = asyncio.Event()
+        probe = asyncio.create_task(probe_health(client, stop_event, args.probe_interval))
+
+        start = time.perf_counter()
+        latencies, statuses = await run_load(client, args, headers, body)
+        elapsed = time.perf_counter() - start
+
+        stop_event.set()
+        health_latencies = await probe
+
+    print(f"{args.method} {args.path}  concurrency={args.concurrency}  elapsed={elapsed:.2f}s  statuses={statuses}")
+    summarize('load', latencies, elapsed)
+    summarize('/health', health_latencies)
+    if latencies:
+        print(f"mean latency {statistics.mean(latencies) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent load benchmark")
+    parser.add_argument('--url', default='http://127.0.0.1:8080')
+    parser.add_argument('--path', default='/health')
+    parser.add_argument('--method', default='GET')
+    parser.add_argument('--token', default=None)
+    parser.add_argument('--body', default=None, help="JSON request body")
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--probe-interval', type=float, default=0.05)
+    asyncio.run(main(parser.parse_args()))
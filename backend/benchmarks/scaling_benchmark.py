@@ -0,0 +1,85 @@
+"""
+Throughput scaling benchmark for the multi-worker server.
+
+Starts serve.py with each worker count in turn, runs the same load as
+load_benchmark.py against it, and prints throughput per worker count, so
+the speedup from adding cores is visible in one table.
+
+    python benchmarks/scaling_benchmark.py --workers 1 2 4 --path /prediction/predict \
+        --token <jwt> --body '{"gender": "Male", "age": 67, ...}' --concurrency 64 --requests 2000
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import httpx
+
+from load_benchmark import percentile, run_load
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def wait_until_healthy(url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/health", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Server at {url} did not become healthy")
+
+
+async def measure(args, url):
+    headers = {'Authorization': f'Bearer {args.token}'} if args.token else {}
+    body = json.loads(args.body) if args.body else None
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        # Warm every worker before timing
+        await asyncio.gather(*(client.get('/health') for _ in range(args.concurrency)))
+        start = time.perf_counter()
+        latencies, statuses = await run_load(client, args, headers, body)
+        return latencies, statuses, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput vs. worker count")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--path', default='/health')
+    parser.add_argument('--method', default='GET')
+    parser.add_argument('--token', default=None)
+    parser.add_argument('--body', default=None, help="JSON request body")
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    url = f"http://127.0.0.1:{args.port}"
+    rows = []
+    for workers in args.workers:
+        server = subprocess.Popen(
+            [sys.executable, 'serve.py', '--workers', str(workers), '--bind', f'127.0.0.1:{args.port}'],
+            cwd=backend_dir
+        )
+        try:
+            wait_until_healthy(url)
+            latencies, statuses, elapsed = asyncio.run(measure(args, url))
+        finally:
+            server.terminate()
+            server.wait()
+        rows.append((workers, len(latencies) / elapsed, percentile(latencies, 50), percentile(latencies, 99), statuses))
+
+    baseline = rows[0][1]
+    print(f"\n{args.method} {args.path}  concurrency={args.concurrency}  requests={args.requests}  cpus={os.cpu_count()}")
+    print(f"{'workers':>7} {'req/s':>9} {'speedup':>8} {'p50':>9} {'p99':>9}  statuses")
+    for workers, throughput, p50, p99, statuses in rows:
+        print(f"{workers:>7} {throughput:>9.1f} {throughput / baseline:>7.2f}x "
+              f"{p50 * 1000:>7.1f}ms {p99 * 1000:>7.1f}ms  {statuses}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Signin password-check throughput under parallel load.
+
+Fires --requests concurrent password verifications through the same
+limiter and process pool that /auth/signin uses, while a ticker measures
+event-loop stalls. Reports verifications/s, how many requests were shed
+with 429, and loop lag. --inline runs bcrypt on the event loop instead, as
+the handlers originally did, for comparison. No database is needed; for an
+end-to-end run use load_benchmark.py with --method POST --path /auth/signin.
+
+    python benchmarks/signin_benchmark.py --requests 200 --concurrency 50 --rounds 12
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from fastapi import HTTPException
+from controller import passwords
+from load_benchmark import percentile
+
+PASSWORD = "Patient123!"
+
+
+async def ticker(stop_event, interval=0.01):
+    lags = []
+    while not stop_event.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+    return lags
+
+
+async def run(args, hashed):
+    remaining = iter(range(args.requests))
+    latencies = []
+    shed = 0
+
+    async def worker():
+        nonlocal shed
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                if args.inline:
+                    passwords.verify_and_upgrade(PASSWORD, hashed, args.rounds)
+                    await asyncio.sleep(0)
+                else:
+                    await passwords.run_password_task(passwords.verify_and_upgrade, PASSWORD, hashed, args.rounds)
+                latencies.append(time.perf_counter() - start)
+            except HTTPException:
+                shed += 1
+
+    # Start the pool's processes before timing
+    if not args.inline:
+        await asyncio.gather(*(
+            passwords.run_password_task(passwords.hash_rounds, hashed)
+            for _ in range(passwords.PASSWORD_POOL_SIZE)
+        ))
+
+    stop_event = asyncio.Event()
+    lag_task = asyncio.create_task(ticker(stop_event))
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+    stop_event.set()
+    lags = await lag_task
+
+    mode = 'inline' if args.inline else f"pool={passwords.PASSWORD_POOL_SIZE} max_pending={passwords.PASSWORD_MAX_PENDING}"
+    print(f"{mode}  rounds={args.rounds}  concurrency={args.concurrency}  elapsed={elapsed:.2f}s")
+    print(f"verified={len(latencies)}  shed_429={shed}  throughput={len(latencies) / elapsed:.1f}/s")
+    print(f"latency p50={percentile(latencies, 50) * 1000:.1f}ms p99={percentile(latencies, 99) * 1000:.1f}ms")
+    print(f"event loop lag p50={percentile(lags, 50) * 1000:.1f}ms max={max(lags, default=0) * 1000:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Password verification throughput benchmark")
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--rounds', type=int, default=passwords.BCRYPT_ROUNDS)
+    parser.add_argument('--inline', action='store_true', help="Verify on the event loop thread")
+    args = parser.parse_args()
+
+    hashed = passwords.hash_password(PASSWORD, args.rounds)
+    asyncio.run(run(args, hashed))
+    passwords.shutdown_password_pool()
+
+
+if __name__ == "__main__":
+    main()
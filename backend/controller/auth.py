@@ -1,14 +1,19 @@
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel, EmailStr, field_validator
-from database.mySql_connection import db, Session
+from database.mySql_connection import get_db
 from sqlalchemy import text
-import bcrypt
+from sqlalchemy.exc import IntegrityError
+from pymysql.constants import ER
 import re
 from typing import Optional
 import jwt
 import os
 from dotenv import load_dotenv
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from .concurrency import run_blocking
+from .user_profiles import invalidate_user
+from .passwords import hash_password_async, verify_password
+from .jwt_auth import SECRET_KEY, JWT_ALGORITHM
 
 load_dotenv()
 
@@ -56,8 +61,30 @@ def is_valid_email(email):
     pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
     return re.match(pattern, email) is not None
 
+def get_user_by_email(db, email):
+    # Only what signin needs; email has a unique index
+    query = text("SELECT id, name, email, role, password FROM users WHERE email = :email")
+    return db.execute(query, {'email': email}).fetchone()
+
+def is_duplicate_entry(error: IntegrityError) -> bool:
+    return bool(getattr(error.orig, 'args', None)) and error.orig.args[0] == ER.DUP_ENTRY
+
+def create_user(db, params):
+    insert_user_query = text("""
+        INSERT INTO users (name, email, password, role, phoneNumber, DOB, gender)
+        VALUES (:name, :email, :password, :role, :phoneNumber, :DOB, :gender)
+    """)
+    result = db.execute(insert_user_query, params)
+    db.commit()
+    return result.lastrowid
+
+def update_password_hash(db, user_id, hashed_password):
+    query = text("UPDATE users SET password = :password WHERE id = :id")
+    db.execute(query, {'password': hashed_password, 'id': user_id})
+    db.commit()
+
 @api.post('/signup', response_model=SignupResponse, status_code=201)
-async def signup(request: SignupRequest):
+async def signup(request: SignupRequest, db = Depends(get_db)):
     """User registration endpoint"""
     try:
         first_name = request.firstName.strip()   
@@ -76,47 +103,41 @@ async def signup(request: SignupRequest):
                 detail="Passwords do not match"
         )
         
-        #logic two: check that a user already exists in the database
-        check_user_query = text("SELECT * FROM users WHERE email = :email")
-        existing_user = db.execute(check_user_query, {'email': email}).fetchone()
-        
-        if existing_user:
+        # logic two: validate the role before paying for the hash
+        if role not in ['patient', 'doctor']:
             raise HTTPException(
-                status_code=409,
-                detail="User with this email already exists"
-            )
+                status_code=400,
+                detail="Role must be either 'patient' or 'doctor'"
+        )
         
         # logic three: Basically to insert the values into the database
         # logic 3A
-        salt = bcrypt.gensalt()
-        hashed_password = bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+        hashed_password = await hash_password_async(password)
         
         # logic 3B
         full_name = f"{first_name} {last_name}"
         
-        # logic 3c
-        if role not in ['patient', 'doctor']:
-            raise HTTPException(
-                status_code=400,
-                detail="Role must be either 'patient' or 'doctor'"
-        )
-        
-        # logic 3d
-        insert_user_query = text("""
-            INSERT INTO users (name, email, password, role, phoneNumber, DOB, gender)
-            VALUES (:name, :email, :password, :role, :phoneNumber, :DOB, :gender)
-        """)
-        
-        db.execute(insert_user_query, {
-            'name': full_name,
-            'email': email,
-            'password': hashed_password,
-            'role': role,
-            'phoneNumber': phone,
-            'DOB': dob,
-            'gender': gender
-        })
-        db.commit()
+        # logic 3C: the unique index on email rejects an existing user, no pre-check needed
+        try:
+            user_id = await run_blocking(create_user, db, {
+                'name': full_name,
+                'email': email,
+                'password': hashed_password,
+                'role': role,
+                'phoneNumber': phone,
+                'DOB': dob,
+                'gender': gender
+            })
+        except IntegrityError as e:
+            await run_blocking(db.rollback)
+            if is_duplicate_entry(e):
+                raise HTTPException(
+                    status_code=409,
+                    detail="User with this email already exists"
+                )
+            raise
+        
+        invalidate_user(user_id)
         
         return {
             'success': True,
@@ -130,21 +151,20 @@ async def signup(request: SignupRequest):
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await run_blocking(db.rollback)
         raise HTTPException(
             status_code=500,
             detail=f'An error occurred during registration: {str(e)}'
         )
 
 @api.post('/signin', response_model=SigninResponse, status_code=200)
-async def signin(request: SigninRequest):
+async def signin(request: SigninRequest, db = Depends(get_db)):
     """User authentication endpoint"""
     try:
         email = request.email.strip()
         password = request.password
         
-        get_user_query = text("SELECT * FROM users WHERE email = :email")
-        user = db.execute(get_user_query, {'email': email}).fetchone()
+        user = await run_blocking(get_user_by_email, db, email)
         
         if not user:
             raise HTTPException(
@@ -152,16 +172,24 @@ async def signin(request: SigninRequest):
                 detail='Invalid email or password'
             )
         
-        stored_password = user.password.encode('utf-8') if isinstance(user.password, str) else user.password
-        password_bytes = password.encode('utf-8')
+        stored_password = user.password.decode('utf-8') if isinstance(user.password, bytes) else user.password
         
-        if not bcrypt.checkpw(password_bytes, stored_password):
+        matches, upgraded_hash = await verify_password(password, stored_password)
+        if not matches:
             raise HTTPException(
                 status_code=401,
                 detail='Invalid email or password'
             )
         
-        expiry = datetime.now() + timedelta(minutes=int(os.getenv("expiry_time", 1440)))
+        # The hash was made with a different bcrypt cost; store the rehashed one
+        if upgraded_hash:
+            try:
+                await run_blocking(update_password_hash, db, user.id, upgraded_hash)
+            except Exception as e:
+                await run_blocking(db.rollback)
+                print(f"Warning: Failed to upgrade password hash: {str(e)}")
+        
+        expiry = datetime.now(timezone.utc) + timedelta(minutes=int(os.getenv("expiry_time", 1440)))
         details = {
             "id": user.id,
             "email": user.email,
@@ -169,11 +197,10 @@ async def signin(request: SigninRequest):
             "exp": expiry
         }
         
-        secret_key = os.getenv("secret_key")
-        if not secret_key:
+        if not SECRET_KEY:
             raise HTTPException(status_code=500, detail="Server configuration error: secret_key not found")
         
-        token = jwt.encode(details, secret_key, algorithm="HS256")
+        token = jwt.encode(details, SECRET_KEY, algorithm=JWT_ALGORITHM)
         
         user_dict = {
             'id': user.id,
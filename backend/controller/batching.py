@@ -0,0 +1,69 @@
+import asyncio
+from .concurrency import run_blocking
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-record calls into one batched call
+
+    The first record to arrive opens a window of max_wait seconds; every
+    record submitted before it closes, up to max_batch_size, is scored by a
+    single score(records) call on the blocking pool, and each caller gets its
+    own row back. A full batch is dispatched without waiting for the window.
+    Lives on the event loop, so no locking is needed.
+    """
+
+    def __init__(self, score, max_batch_size: int = 32, max_wait: float = 0.002):
+        self.score = score
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._pending = []
+        self._timer = None
+        self._tasks = set()
+        self.batches = 0
+        self.records = 0
+
+    async def submit(self, record):
+        """Queue one record and wait for its (prediction, probability)"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((record, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._dispatch)
+        return await future
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._score_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _score_batch(self, batch):
+        self.batches += 1
+        self.records += len(batch)
+        try:
+            predictions, probabilities = await run_blocking(self.score, [record for record, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), prediction, probability in zip(batch, predictions, probabilities):
+            # A caller that disconnected has a cancelled future; skip it
+            if not future.done():
+                future.set_result((prediction, probability))
+
+    def stats(self) -> dict:
+        return {
+            'batches': self.batches,
+            'records': self.records,
+            'avg_batch_size': round(self.records / self.batches, 2) if self.batches else 0.0,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000
+        }
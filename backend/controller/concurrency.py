@@ -0,0 +1,20 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BLOCKING_POOL_SIZE = int(os.getenv('blocking_pool_size') or 16)
+
+# pymysql, pymongo and model scoring all block; they run here instead of on the event loop
+blocking_executor = ThreadPoolExecutor(max_workers=BLOCKING_POOL_SIZE, thread_name_prefix='blocking')
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking call on the sized thread pool and await its result"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(blocking_executor, partial(func, *args, **kwargs))
+
+def shutdown_executor():
+    blocking_executor.shutdown(wait=True)
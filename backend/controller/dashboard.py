@@ -1,10 +1,14 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Optional, Literal
+from datetime import date
 from .jwt_auth import verify_token
-from .stroke_data_service import get_all_stroke_predictions
-from database.mySql_connection import db
-from sqlalchemy import text
+from .stroke_data_service import (get_all_stroke_predictions, get_cached_risk_summary, get_prediction_history,
+                                  build_prediction_filter, count_stroke_predictions, explain_page_query)
+from .prediction import PredictionHistoryResponse, build_history_response
+from database.mySql_connection import get_db
+from .user_profiles import get_user_names
+from .concurrency import run_blocking
 
 api = APIRouter(prefix='/dashboard', tags=['dashboard'])
 
@@ -30,15 +34,97 @@ class DashboardResponse(BaseModel):
     page_size: int
     has_next: bool
     has_prev: bool
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+    matching_predictions: int
+    query_plan: Optional[dict] = None
+
+def load_dashboard_page(
+    db,
+    page: int,
+    page_size: int,
+    cursor: Optional[str] = None,
+    filters: Optional[dict] = None,
+    debug: bool = False
+) -> dict:
+    """
+    Blocking part of the dashboard: one page from MongoDB plus the pre-aggregated headline counts
+    
+    Filters are applied in the MongoDB query, and only a filtered view pays
+    for an (index-only) count of its matches; the headline counts stay global.
+    """
+    summary = get_cached_risk_summary()
+    
+    total_predictions = summary['total_predictions']
+    query, index = build_prediction_filter(**(filters or {}))
+    matching_predictions = count_stroke_predictions(query, hint=index) if query else total_predictions
+    total_pages = (matching_predictions + page_size - 1) // page_size  # Ceiling division
+    current_page = min(page, total_pages) if total_pages > 0 else 1
+    
+    # With a cursor the page is a keyset seek; page only labels where the client is
+    page_data = get_all_stroke_predictions(
+        limit=page_size,
+        skip=(current_page - 1) * page_size,
+        cursor=cursor,
+        query=query,
+        hint=index
+    )
+    page_predictions = page_data['items']
+    
+    user_ids = list(set([pred.get('user_id') for pred in page_predictions if pred.get('user_id')]))
+    
+    user_names = get_user_names(db, user_ids)
+    
+    paginated_predictions = []
+    for pred in page_predictions:
+        user_id = pred.get('user_id')
+        paginated_predictions.append({
+            'prediction_id': pred.get('_id'),
+            'user_id': user_id,
+            'user_email': pred.get('user_email', ''),
+            'user_name': user_names.get(user_id),
+            'input_data': pred.get('input_data', {}),
+            'prediction': pred.get('prediction', {}),
+            'created_at': pred.get('created_at').isoformat() if pred.get('created_at') else ''
+        })
+    
+    return {
+        'success': True,
+        'total_patients': summary['total_patients'],
+        'total_predictions': total_predictions,
+        'high_risk_count': summary['high_risk_count'],
+        'moderate_risk_count': summary['moderate_risk_count'],
+        'low_risk_count': summary['low_risk_count'],
+        'predictions': paginated_predictions,
+        'current_page': current_page,
+        'total_pages': total_pages,
+        'page_size': page_size,
+        'has_next': page_data['next_cursor'] is not None,
+        'has_prev': page_data['prev_cursor'] is not None,
+        'next_cursor': page_data['next_cursor'],
+        'prev_cursor': page_data['prev_cursor'],
+        'matching_predictions': matching_predictions,
+        'query_plan': explain_page_query(query, page_size, hint=index) if debug else None
+    }
 
 @api.get('/patients', response_model=DashboardResponse)
 async def get_all_patients(
     page: int = Query(1, ge=1, description="Page number (starts from 1)"),
     page_size: int = Query(10, ge=1, le=100, description="Number of items per page"),
-    token_payload: dict = Depends(verify_token)
+    cursor: Optional[str] = Query(None, description="next_cursor or prev_cursor from a previous page (send the same filters)"),
+    risk_level: Optional[Literal['Low', 'Moderate', 'High']] = Query(None, description="Only this risk level"),
+    min_age: Optional[float] = Query(None, ge=0, description="Minimum age (inclusive)"),
+    max_age: Optional[float] = Query(None, ge=0, description="Maximum age (inclusive)"),
+    start_date: Optional[date] = Query(None, description="First prediction day included (UTC)"),
+    end_date: Optional[date] = Query(None, description="Last prediction day included (UTC)"),
+    hypertension: Optional[int] = Query(None, ge=0, le=1, description="Hypertension: 0 or 1"),
+    heart_disease: Optional[int] = Query(None, ge=0, le=1, description="Heart disease: 0 or 1"),
+    debug: bool = Query(False, description="Include the MongoDB query plan in the response"),
+    token_payload: dict = Depends(verify_token),
+    db = Depends(get_db)
 ):
     """
-    Get all patients and their stroke predictions with pagination (Doctor only)
+    Get all patients and their stroke predictions with pagination and optional filters (Doctor only)
     """
     try:
         if token_payload.get("role") != 'doctor':
@@ -47,76 +133,21 @@ async def get_all_patients(
                 detail="Only doctors can access this endpoint"
             )
         
-        all_predictions_data = get_all_stroke_predictions(limit=10000)
-        
-        user_ids = list(set([pred.get('user_id') for pred in all_predictions_data if pred.get('user_id')]))
-        
-        user_names = {}
-        if user_ids:
-            user_ids_tuple = tuple(user_ids)
-            if len(user_ids_tuple) == 1:
-                query = text("SELECT id, name, email FROM users WHERE id = :user_id")
-                users = db.execute(query, {'user_id': user_ids_tuple[0]}).fetchall()
-            else:
-                placeholders = ','.join([f':id{i}' for i in range(len(user_ids))])
-                query = text(f"SELECT id, name, email FROM users WHERE id IN ({placeholders})")
-                params = {f'id{i}': user_id for i, user_id in enumerate(user_ids)}
-                users = db.execute(query, params).fetchall()
-            
-            for user in users:
-                user_names[user.id] = user.name
-        
-        all_processed = []
-        high_risk = 0
-        moderate_risk = 0
-        low_risk = 0
-        
-        for pred in all_predictions_data:
-            user_id = pred.get('user_id')
-            risk_level = pred.get('prediction', {}).get('risk_level', 'Low')
-            
-            if risk_level == 'High':
-                high_risk += 1
-            elif risk_level == 'Moderate':
-                moderate_risk += 1
-            else:
-                low_risk += 1
-            
-            processed_pred = {
-                'prediction_id': pred.get('_id'),
-                'user_id': user_id,
-                'user_email': pred.get('user_email', ''),
-                'user_name': user_names.get(user_id),
-                'input_data': pred.get('input_data', {}),
-                'prediction': pred.get('prediction', {}),
-                'created_at': pred.get('created_at').isoformat() if pred.get('created_at') else ''
-            }
-            all_processed.append(processed_pred)
+        if min_age is not None and max_age is not None and min_age > max_age:
+            raise HTTPException(status_code=400, detail="min_age cannot be greater than max_age")
+        if start_date is not None and end_date is not None and start_date > end_date:
+            raise HTTPException(status_code=400, detail="start_date cannot be after end_date")
         
-        all_processed.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-        
-        total_predictions = len(all_processed)
-        total_pages = (total_predictions + page_size - 1) // page_size  # Ceiling division
-        current_page = min(page, total_pages) if total_pages > 0 else 1
-        
-        start_idx = (current_page - 1) * page_size
-        end_idx = start_idx + page_size
-        paginated_predictions = all_processed[start_idx:end_idx]
-        
-        return {
-            'success': True,
-            'total_patients': len(user_ids),
-            'total_predictions': total_predictions,
-            'high_risk_count': high_risk,
-            'moderate_risk_count': moderate_risk,
-            'low_risk_count': low_risk,
-            'predictions': paginated_predictions,
-            'current_page': current_page,
-            'total_pages': total_pages,
-            'page_size': page_size,
-            'has_next': current_page < total_pages,
-            'has_prev': current_page > 1
+        filters = {
+            'risk_level': risk_level,
+            'min_age': min_age,
+            'max_age': max_age,
+            'start_date': start_date,
+            'end_date': end_date,
+            'hypertension': hypertension,
+            'heart_disease': heart_disease
         }
+        return await run_blocking(load_dashboard_page, db, page, page_size, cursor, filters, debug)
     
     except HTTPException:
         raise
@@ -126,3 +157,35 @@ async def get_all_patients(
             detail=f"Error retrieving patient data: {str(e)}"
         )
 
+def load_patient_history(db, user_id: int, page_size: int, cursor: Optional[str] = None) -> dict:
+    page_data = get_prediction_history(user_id, page_size, cursor)
+    user_name = get_user_names(db, [user_id]).get(user_id)
+    return build_history_response(user_id, page_size, page_data, user_name=user_name)
+
+@api.get('/patients/{user_id}', response_model=PredictionHistoryResponse)
+async def get_patient_history(
+    user_id: int,
+    page_size: int = Query(20, ge=1, le=100, description="Number of items per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor or prev_cursor from a previous page"),
+    token_payload: dict = Depends(verify_token),
+    db = Depends(get_db)
+):
+    """
+    One patient's stroke predictions, newest first (Doctor only)
+    """
+    try:
+        if token_payload.get("role") != 'doctor':
+            raise HTTPException(
+                status_code=403,
+                detail="Only doctors can access this endpoint"
+            )
+        
+        return await run_blocking(load_patient_history, db, user_id, page_size, cursor)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error retrieving patient history: {str(e)}"
+        )
@@ -0,0 +1,145 @@
+import json
+import os
+import numpy as np
+
+FOREST_FORMAT_VERSION = 1
+DEFAULT_THRESHOLD = 0.5
+
+
+def compile_forest(model) -> dict:
+    """
+    Flatten a fitted RandomForestClassifier into contiguous NumPy arrays
+
+    All trees share one node table. Leaves point both children at themselves,
+    so evaluation can run a fixed number of steps without branching. Leaf
+    values are per-tree class probabilities, exactly what each tree's
+    predict_proba returns.
+    """
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        node_ids = np.arange(tree.node_count)
+        is_leaf = tree.children_left == -1
+
+        features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+        thresholds.append(tree.threshold.astype(np.float64))
+        lefts.append(np.where(is_leaf, node_ids, tree.children_left).astype(np.int32) + offset)
+        rights.append(np.where(is_leaf, node_ids, tree.children_right).astype(np.int32) + offset)
+
+        value = tree.value[:, 0, :].astype(np.float64)
+        normalizer = value.sum(axis=1, keepdims=True)
+        normalizer[normalizer == 0.0] = 1.0
+        values.append(value / normalizer)
+
+        roots.append(offset)
+        offset += tree.node_count
+        max_depth = max(max_depth, tree.max_depth)
+
+    return {
+        'feature': np.concatenate(features),
+        'threshold': np.concatenate(thresholds),
+        'left': np.concatenate(lefts),
+        'right': np.concatenate(rights),
+        'value': np.concatenate(values),
+        'roots': np.array(roots, dtype=np.int32),
+        'max_depth': np.array(max_depth, dtype=np.int32),
+        'classes': np.asarray(model.classes_)
+    }
+
+
+class CompiledForest:
+    """Vectorized evaluator for a forest flattened by compile_forest"""
+
+    # Rows evaluated together; keeps the (trees x rows) node arrays cache-sized
+    ROW_BLOCK = 256
+
+    def __init__(self, arrays: dict):
+        self.feature = arrays['feature'].astype(np.intp)
+        self.threshold = arrays['threshold']
+        # children[2 * node + went_left] is the next node, one gather per level
+        self.children = np.stack([arrays['right'], arrays['left']], axis=1).ravel().astype(np.intp)
+        self.value = arrays['value']
+        self.roots = arrays['roots'].astype(np.intp)
+        self.max_depth = int(arrays['max_depth'])
+        self.classes_ = arrays['classes']
+        self.n_estimators = len(self.roots)
+
+    def apply(self, X) -> np.ndarray:
+        """Leaf index reached in every tree for every row, shape (n_trees, n_rows)"""
+        # sklearn casts inputs to float32 before comparing against float64 thresholds
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_features = X.shape
+        flat = X.ravel()
+        row_offsets = (np.arange(n_rows, dtype=np.intp) * n_features)[None, :]
+        nodes = np.repeat(self.roots[:, None], n_rows, axis=1)
+        for _ in range(self.max_depth):
+            went_left = flat.take(row_offsets + self.feature.take(nodes)) <= self.threshold.take(nodes)
+            nodes = self.children.take(2 * nodes + went_left)
+        return nodes
+
+    def predict_proba(self, X) -> np.ndarray:
+        X = np.asarray(X)
+        proba = np.zeros((X.shape[0], self.value.shape[1]), dtype=np.float64)
+        for start in range(0, X.shape[0], self.ROW_BLOCK):
+            block = proba[start:start + self.ROW_BLOCK]
+            # Accumulate tree by tree in order, as sklearn does, so results are bit-identical
+            for tree_leaves in self.apply(X[start:start + self.ROW_BLOCK]):
+                block += self.value.take(tree_leaves, axis=0)
+        proba /= self.n_estimators
+        return proba
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+
+def _preprocessor_to_json(preprocessor: dict) -> str:
+    return json.dumps({
+        key: value.tolist() if isinstance(value, np.ndarray) else value
+        for key, value in preprocessor.items()
+    })
+
+def _preprocessor_from_json(raw: str) -> dict:
+    preprocessor = json.loads(raw)
+    for key in ('impute_means', 'scaler_mean', 'scaler_scale'):
+        preprocessor[key] = np.array(preprocessor[key], dtype=np.float64)
+    return preprocessor
+
+def save_compiled_model(filepath, model, preprocessor, metadata=None):
+    """
+    Export a forest and its preprocessor as one .npz artifact, written atomically
+
+    Nothing in the file is pickled, so loading it is just reading arrays.
+    """
+    arrays = compile_forest(model)
+    meta = {'format_version': FOREST_FORMAT_VERSION, **(metadata or {})}
+    tmp_path = f"{filepath}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.savez(
+            f,
+            preprocessor=np.array(_preprocessor_to_json(preprocessor)),
+            metadata=np.array(json.dumps(meta)),
+            **arrays
+        )
+    os.replace(tmp_path, filepath)
+
+def load_compiled_model(source) -> dict:
+    """
+    Load an artifact written by save_compiled_model
+
+    Returns:
+        dict: model (CompiledForest), preprocessor, decision threshold and metadata
+    """
+    with np.load(source, allow_pickle=False) as data:
+        metadata = json.loads(str(data['metadata']))
+        if metadata.get('format_version') != FOREST_FORMAT_VERSION:
+            raise ValueError(f"Unsupported compiled model format: {metadata.get('format_version')}")
+        arrays = {key: data[key] for key in data.files if key not in ('preprocessor', 'metadata')}
+        preprocessor = _preprocessor_from_json(str(data['preprocessor']))
+    return {
+        'model': CompiledForest(arrays),
+        'preprocessor': preprocessor,
+        'threshold': metadata.get('decision_threshold', DEFAULT_THRESHOLD),
+        'metadata': metadata
+    }
@@ -2,35 +2,42 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import jwt
 import os
+import time
 from dotenv import load_dotenv
-from datetime import datetime
+from .cache import TTLCache
 
 load_dotenv()
 
 security = HTTPBearer()
 
+# Resolved once; signin signs with the same pair
+SECRET_KEY = os.getenv("secret_key")
+JWT_ALGORITHM = "HS256"
+
+# Tokens that already passed verification, so polling clients skip the decode.
+# An entry never outlives the token's own exp.
+verified_token_cache = TTLCache(
+    maxsize=int(os.getenv('token_cache_size') or 10000),
+    ttl=float(os.getenv('token_cache_ttl') or 300)
+)
+
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     token = credentials.credentials
-    secret_key = os.getenv("secret_key")
-    
-    if not secret_key:
+
+    payload = verified_token_cache.get(token)
+    if payload is not None:
+        return payload
+
+    if not SECRET_KEY:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Server configuration error"
         )
-    
+
     try:
-        payload = jwt.decode(token, secret_key, algorithms=["HS256"])
-        
-        exp = payload.get("exp")
-        if exp and datetime.fromtimestamp(exp) < datetime.now():
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Token has expired"
-            )
-        
-        return payload
-        
+        # PyJWT checks exp itself and raises ExpiredSignatureError
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[JWT_ALGORITHM])
+
     except jwt.ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -47,4 +54,9 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
             detail=f"Token verification failed: {str(e)}"
         )
 
+    exp = payload.get("exp")
+    ttl = verified_token_cache.ttl if exp is None else min(verified_token_cache.ttl, exp - time.time())
+    if ttl > 0:
+        verified_token_cache.set(token, payload, ttl=ttl)
 
+    return payload
@@ -1,47 +1,61 @@
 import pandas as pd
 import os
 import pickle
+import argparse
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import (accuracy_score, precision_score, recall_score, f1_score,confusion_matrix)
 from imblearn.over_sampling import SMOTE
-from preprocess import preprocess_data
+from preprocess import (FEATURE_COLUMNS, DEFAULT_CHUNK_SIZE, read_dataset_chunks,
+                        fit_preprocessor_from_chunks, transform_chunks)
+from training_cache import load_or_build, cache_key
+from tuning import successive_halving
+from forest import save_compiled_model
 
 
-def load_preprocessed_data():
-    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    preprocessed_path = os.path.join(backend_dir, 'preprocessed_data.csv')
-    df = pd.read_csv(preprocessed_path)
-    
-    X = df.drop('stroke', axis=1)
-    y = df['stroke']
-    
+def encode_dataset(dataset_path, chunksize=DEFAULT_CHUNK_SIZE):
+    """Fit the preprocessor and encode the dataset, streaming the CSV twice in chunks"""
+    preprocessor = fit_preprocessor_from_chunks(read_dataset_chunks(dataset_path, chunksize))
+    X, y = transform_chunks(read_dataset_chunks(dataset_path, chunksize), preprocessor)
+    return X, y, preprocessor
+
+def load_training_data(dataset_path, use_cache=True):
+    """Encoded training matrix, served from the binary cache when the dataset is unchanged"""
+    if not use_cache:
+        return encode_dataset(dataset_path)
+    return load_or_build(dataset_path, encode_dataset)
+
+def split_and_resample(X, y, sampling_strategy='auto'):
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
     
-    smote = SMOTE(random_state=42)
+    smote = SMOTE(sampling_strategy=sampling_strategy, random_state=42)
     X_train_resampled, y_train_resampled = smote.fit_resample(X_train, y_train)
     
-    X_train_resampled = pd.DataFrame(X_train_resampled, columns=X_train.columns)
-    y_train_resampled = pd.Series(y_train_resampled)
-    
     return X_train_resampled, X_test, y_train_resampled, y_test
 
-def train_random_forest(X_train, y_train, n_estimators=100, random_state=42):
+DEFAULT_RF_PARAMS = {
+    'max_depth': 10,
+    'min_samples_split': 5,
+    'min_samples_leaf': 2
+}
+
+def train_random_forest(X_train, y_train, n_estimators=100, random_state=42, **params):
     rf_model = RandomForestClassifier(
         n_estimators=n_estimators,
         random_state=random_state,
-        max_depth=10,
-        min_samples_split=5,
-        min_samples_leaf=2,
-        n_jobs=-1
+        n_jobs=-1,
+        **{**DEFAULT_RF_PARAMS, **params}
     )
     
-    rf_model.fit(X_train, y_train)  
+    rf_model.fit(X_train, y_train)
 
     return rf_model
 
-def evaluate_model(model, X_test, y_test):
-    y_pred = model.predict(X_test)
+def evaluate_model(model, X_test, y_test, threshold=None):
+    if threshold is None:
+        y_pred = model.predict(X_test)
+    else:
+        y_pred = (model.predict_proba(X_test)[:, 1] > threshold).astype(int)
 
     accuracy = accuracy_score(y_test, y_pred)
     precision = precision_score(y_test, y_pred)
@@ -51,7 +65,7 @@ def evaluate_model(model, X_test, y_test):
     cm = confusion_matrix(y_test, y_pred)
     
     feature_importance = pd.DataFrame({
-        'feature': X_test.columns,
+        'feature': FEATURE_COLUMNS,
         'importance': model.feature_importances_
     }).sort_values('importance', ascending=False)
     
@@ -67,24 +81,55 @@ def evaluate_model(model, X_test, y_test):
     return metrics
 
 def save_model(model, filepath):
-    with open(filepath, 'wb') as f:
+    # Write to a temp file and rename so a running server never reads a half-written model
+    tmp_path = f"{filepath}.tmp"
+    with open(tmp_path, 'wb') as f:
         pickle.dump(model, f)
+    os.replace(tmp_path, filepath)
 
-def main():
+def main(use_cache=True, tune=False, metric='f1_score', threshold=None, folds=5,
+         max_configs=None, workers=None):
     try:
         backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         dataset_path = os.path.join(backend_dir, 'dataset.csv')
-        df = pd.read_csv(dataset_path)
         
-        preprocess_data(df)
+        n_estimators = 100
+        rf_params = {}
+        smote_ratio = 'auto'
+        if tune:
+            # Workers memory-map the cached matrix, so tuning always goes through the cache
+            key = cache_key(dataset_path)
+            X, y, preprocessor = load_or_build(dataset_path, encode_dataset, key=key)
+            best = successive_halving(
+                key, y,
+                n_folds=folds,
+                threshold=0.5 if threshold is None else threshold,
+                metric=metric,
+                max_configs=max_configs,
+                workers=workers
+            )
+            rf_params = {name: value for name, value in best['config'].items() if name != 'smote_ratio'}
+            smote_ratio = best['config']['smote_ratio']
+            n_estimators = best['n_estimators']
+            print(f"\nSelected: {best['config']} with {n_estimators} trees "
+                  f"(cv {metric}={best[metric]:.4f})")
+        else:
+            X, y, preprocessor = load_training_data(dataset_path, use_cache=use_cache)
         
-        X_train, X_test, y_train, y_test = load_preprocessed_data()
-        model = train_random_forest(X_train, y_train, n_estimators=100)
-        metrics = evaluate_model(model, X_test, y_test)
+        X_train, X_test, y_train, y_test = split_and_resample(X, y, sampling_strategy=smote_ratio)
+        model = train_random_forest(X_train, y_train, n_estimators=n_estimators, **rf_params)
+        metrics = evaluate_model(model, X_test, y_test, threshold=threshold)
         
         backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         model_path = os.path.join(backend_dir, 'stroke_model.pkl')
-        save_model(model, model_path)
+        # Stored with the model so serving labels rows exactly as evaluated here
+        decision_threshold = 0.5 if threshold is None else threshold
+        save_model({'model': model, 'preprocessor': preprocessor, 'threshold': decision_threshold}, model_path)
+        # The server loads this flattened copy of the same forest
+        save_compiled_model(
+            os.path.join(backend_dir, 'stroke_model.npz'), model, preprocessor,
+            metadata={'decision_threshold': decision_threshold}
+        )
         
         metrics_path = os.path.join(backend_dir, 'model_metrics.txt')
         with open(metrics_path, 'w') as f:
@@ -94,9 +139,31 @@ def main():
             f.write(f"Precision: {metrics['precision']:.4f}\n")
             f.write(f"Recall:    {metrics['recall']:.4f}\n")
             f.write(f"F1-Score:  {metrics['f1_score']:.4f}\n")
+            if threshold is not None:
+                f.write(f"Threshold: {threshold:.2f}\n")
+            if tune:
+                f.write(f"\nTuned parameters: n_estimators={n_estimators}, "
+                        f"smote_ratio={smote_ratio}, {rf_params}\n")
     except Exception as e:
         print(str(e))
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Train the stroke prediction model")
+    parser.add_argument('--no-cache', action='store_true', help="Re-encode the dataset instead of using the training cache")
+    parser.add_argument('--tune', action='store_true', help="Run a cross-validated successive-halving search before training")
+    parser.add_argument('--metric', choices=['recall', 'f1_score'], default='f1_score', help="Metric the search selects on")
+    parser.add_argument('--threshold', type=float, default=None, help="Decision threshold on the stroke probability")
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--max-configs', type=int, default=None, help="Randomly sample this many configs from the grid")
+    parser.add_argument('--workers', type=int, default=None, help="Process pool size (defaults to the CPU count)")
+    args = parser.parse_args()
+    main(
+        use_cache=not args.no_cache,
+        tune=args.tune,
+        metric=args.metric,
+        threshold=args.threshold,
+        folds=args.folds,
+        max_configs=args.max_configs,
+        workers=args.workers
+    )
 
@@ -0,0 +1,158 @@
+import hashlib
+import io
+import os
+import pickle
+import threading
+from datetime import datetime
+from dotenv import load_dotenv
+from .forest import load_compiled_model, DEFAULT_THRESHOLD
+
+load_dotenv()
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class ModelRegistry:
+    """
+    Process-wide holder for the trained model artifact (model + fitted preprocessor).
+
+    A .npz path is the compiled forest exported by model.py; anything else is
+    read as the pickled scikit-learn bundle. The decision threshold comes from
+    the artifact unless decision_threshold overrides it, so it can be tuned
+    without retraining.
+
+    The model is loaded once (at startup) and served from memory. A background
+    watcher polls the file's mtime/size and, when it changes, loads and hashes
+    the new file off the request path before swapping the reference, so a
+    retrain never makes a request pay for unpickling.
+    """
+
+    def __init__(self, model_path: str, check_interval: float = 5.0, decision_threshold: float = None):
+        self.model_path = model_path
+        self.check_interval = check_interval
+        self.decision_threshold = decision_threshold
+        self._lock = threading.Lock()
+        self._artifact = None
+        self._version = None
+        self._loaded_at = None
+        self._file_stat = None
+        self._stop_event = threading.Event()
+        self._watcher = None
+        self._swap_listeners = []
+
+    def load(self) -> bool:
+        """
+        Load the model file and swap it in if its content changed
+
+        Returns:
+            bool: True if a new model version was swapped in
+        """
+        if not os.path.exists(self.model_path):
+            raise FileNotFoundError("Model file not found. Please train the model first.")
+
+        stat = os.stat(self.model_path)
+        with open(self.model_path, 'rb') as f:
+            raw = f.read()
+        version = hashlib.sha256(raw).hexdigest()[:12]
+
+        if version == self._version:
+            self._file_stat = (stat.st_mtime_ns, stat.st_size)
+            return False
+
+        if self.model_path.endswith('.npz'):
+            artifact = load_compiled_model(io.BytesIO(raw))
+        else:
+            artifact = pickle.loads(raw)
+        if not isinstance(artifact, dict) or 'preprocessor' not in artifact:
+            raise ValueError("Model file has no fitted preprocessor. Please retrain the model.")
+
+        if self.decision_threshold is not None:
+            artifact['threshold'] = self.decision_threshold
+        else:
+            artifact.setdefault('threshold', DEFAULT_THRESHOLD)
+
+        # Requests already run concurrently on the blocking pool; joblib fan-out per
+        # single-row call only adds thread start-up cost and oversubscribes cores
+        if hasattr(artifact['model'], 'n_jobs'):
+            artifact['model'].n_jobs = 1
+
+        with self._lock:
+            self._artifact = artifact
+            self._version = version
+            self._loaded_at = datetime.utcnow()
+            self._file_stat = (stat.st_mtime_ns, stat.st_size)
+        print(f"Loaded model version {version} from {self.model_path}")
+        for listener in self._swap_listeners:
+            listener(version)
+        return True
+
+    def add_swap_listener(self, listener):
+        """Call listener(version) every time a new model version is swapped in"""
+        self._swap_listeners.append(listener)
+
+    def get_artifact(self) -> dict:
+        """Return the in-memory model and its fitted preprocessor, never touching the disk"""
+        artifact = self._artifact
+        if artifact is None:
+            raise FileNotFoundError("Model file not found. Please train the model first.")
+        return artifact
+
+    @property
+    def version(self):
+        return self._version
+
+    def info(self) -> dict:
+        return {
+            'loaded': self._artifact is not None,
+            'version': self._version,
+            'threshold': self._artifact['threshold'] if self._artifact is not None else None,
+            'loaded_at': self._loaded_at.isoformat() if self._loaded_at else None,
+            'path': self.model_path
+        }
+
+    def check_for_update(self) -> bool:
+        """Reload the model if the file on disk has changed since the last load"""
+        try:
+            stat = os.stat(self.model_path)
+        except FileNotFoundError:
+            return False
+
+        if (stat.st_mtime_ns, stat.st_size) == self._file_stat:
+            return False
+
+        try:
+            return self.load()
+        except Exception as e:
+            # Keep serving the current model; don't retry this same file every tick
+            self._file_stat = (stat.st_mtime_ns, stat.st_size)
+            print(f"Warning: Failed to reload model: {str(e)}")
+            return False
+
+    def _watch(self):
+        while not self._stop_event.wait(self.check_interval):
+            self.check_for_update()
+
+    def start(self):
+        """Load the model and start the background file watcher"""
+        try:
+            self.load()
+        except Exception as e:
+            print(f"Warning: Model not loaded at startup: {str(e)}")
+
+        if self._watcher is None or not self._watcher.is_alive():
+            self._stop_event.clear()
+            self._watcher = threading.Thread(target=self._watch, name='model-watcher', daemon=True)
+            self._watcher.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=self.check_interval)
+            self._watcher = None
+
+
+model_registry = ModelRegistry(
+    os.getenv('model_path') or os.path.join(backend_dir, 'stroke_model.npz'),
+    check_interval=float(os.getenv('model_reload_interval') or 5),
+    decision_threshold=float(os.getenv('decision_threshold')) if os.getenv('decision_threshold') else None
+)
@@ -0,0 +1,81 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import bcrypt
+from dotenv import load_dotenv
+from fastapi import HTTPException
+
+load_dotenv()
+
+BCRYPT_ROUNDS = int(os.getenv('bcrypt_rounds') or 12)
+PASSWORD_POOL_SIZE = int(os.getenv('password_pool_size') or 2)
+# Hashing requests allowed in flight (running or queued) before new ones get a 429
+PASSWORD_MAX_PENDING = int(os.getenv('password_max_pending') or PASSWORD_POOL_SIZE * 4)
+
+# bcrypt is pure CPU; separate processes keep it off the event loop and out of
+# the thread pool that database calls depend on. spawn, because the server
+# process already runs threads that a fork would copy mid-state.
+password_executor = ProcessPoolExecutor(
+    max_workers=PASSWORD_POOL_SIZE,
+    mp_context=multiprocessing.get_context('spawn')
+)
+_in_flight = 0
+
+def hash_password(password: str, rounds: int = BCRYPT_ROUNDS) -> str:
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+def hash_rounds(hashed: str) -> int:
+    """Cost factor recorded in a bcrypt hash such as $2b$12$..."""
+    return int(hashed.split('$')[2])
+
+def verify_and_upgrade(password: str, hashed: str, rounds: int = BCRYPT_ROUNDS):
+    """
+    Check a password and, if it matches a hash made with a lower cost, rehash it
+
+    Hashes stronger than rounds are kept, so lowering bcrypt_rounds for
+    throughput never weakens stored passwords.
+
+    Returns:
+        tuple: (matches, new hash or None)
+    """
+    if not bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8')):
+        return False, None
+    if hash_rounds(hashed) < rounds:
+        return True, hash_password(password, rounds)
+    return True, None
+
+async def run_password_task(func, *args):
+    """Run a hashing call in the process pool, shedding load with a 429 once the pool is saturated"""
+    global _in_flight
+    if _in_flight >= PASSWORD_MAX_PENDING:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many authentication requests, please try again shortly",
+            headers={'Retry-After': '1'}
+        )
+    # Only the event loop thread touches the counter, so no lock is needed
+    _in_flight += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(password_executor, partial(func, *args))
+    finally:
+        _in_flight -= 1
+
+async def hash_password_async(password: str) -> str:
+    return await run_password_task(hash_password, password, BCRYPT_ROUNDS)
+
+async def verify_password(password: str, hashed: str):
+    return await run_password_task(verify_and_upgrade, password, hashed, BCRYPT_ROUNDS)
+
+def password_pool_stats() -> dict:
+    return {
+        'pool_size': PASSWORD_POOL_SIZE,
+        'max_pending': PASSWORD_MAX_PENDING,
+        'in_flight': _in_flight,
+        'bcrypt_rounds': BCRYPT_ROUNDS
+    }
+
+def shutdown_password_pool():
+    password_executor.shutdown(wait=True)
@@ -1,13 +1,21 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from pydantic import BaseModel, Field
-from typing import Optional
-import pandas as pd
+from typing import List, Optional
 import numpy as np
-import os
-import pickle
-from .preprocess import preprocess_data
+from .preprocess import encode_records
 from .jwt_auth import verify_token
-from .stroke_data_service import save_stroke_prediction
+from .stroke_data_service import build_stroke_document, get_prediction_history
+from .prediction_writer import prediction_writer
+from .model_registry import model_registry
+from .forest import DEFAULT_THRESHOLD
+from .user_profiles import get_user_profiles
+from database.mySql_connection import get_db
+from .concurrency import run_blocking
+from .batching import MicroBatcher
+from .cache import TTLCache
+import hashlib
+import json
+import os
 
 api = APIRouter(prefix='/prediction', tags=['prediction'])
 
@@ -23,6 +31,9 @@ class StrokePredictionRequest(BaseModel):
     bmi: Optional[float] = Field(None, ge=0, le=100, description="BMI (Body Mass Index), can be None")
     smoking_status: str = Field(..., description="Smoking status: never smoked, formerly smoked, smokes, or Unknown")
 
+class CohortPredictionRequest(StrokePredictionRequest):
+    patient_id: Optional[int] = Field(None, description="User id of the patient this row belongs to; required when a doctor submits the cohort")
+
 class StrokePredictionResponse(BaseModel):
     success: bool
     prediction: int
@@ -30,15 +41,119 @@ class StrokePredictionResponse(BaseModel):
     risk_level: str
     message: str
 
-def load_model():
-    """Load the trained model"""
-    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    model_path = os.path.join(backend_dir, 'stroke_model.pkl')
-    if not os.path.exists(model_path):
-        raise FileNotFoundError("Model file not found. Please train the model first.")
-    with open(model_path, 'rb') as f:
-        model = pickle.load(f)
-    return model
+class BatchPredictionResponse(BaseModel):
+    success: bool
+    count: int
+    results: List[StrokePredictionResponse]
+
+class PredictionHistoryItem(BaseModel):
+    prediction_id: str
+    input_data: dict
+    prediction: dict
+    created_at: str
+
+class PredictionHistoryResponse(BaseModel):
+    success: bool
+    user_id: int
+    user_name: Optional[str] = None
+    predictions: List[PredictionHistoryItem]
+    page_size: int
+    has_next: bool
+    has_prev: bool
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+MAX_BATCH_SIZE = 1000
+
+def build_history_response(user_id, page_size, page_data, user_name=None):
+    return {
+        'success': True,
+        'user_id': user_id,
+        'user_name': user_name,
+        'predictions': page_data['items'],
+        'page_size': page_size,
+        'has_next': page_data['next_cursor'] is not None,
+        'has_prev': page_data['prev_cursor'] is not None,
+        'next_cursor': page_data['next_cursor'],
+        'prev_cursor': page_data['prev_cursor']
+    }
+
+def resolve_cohort_owners(db, token_payload, requests):
+    """
+    The (user_id, email) each cohort row is saved under
+
+    A patient's rows are all their own. A doctor uploads rows for many
+    patients, so every row names its patient_id, and each id must belong to a
+    patient account.
+    """
+    if token_payload.get("role") == 'patient':
+        user_id = token_payload.get("id")
+        if any(request.patient_id not in (None, user_id) for request in requests):
+            raise HTTPException(status_code=400, detail="Patients can only submit predictions for themselves")
+        return [(user_id, token_payload.get("email", ""))] * len(requests)
+
+    missing = [i for i, request in enumerate(requests) if request.patient_id is None]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"patient_id is required for every row; missing in rows {missing[:20]}")
+
+    profiles = get_user_profiles(db, [request.patient_id for request in requests])
+    unknown = sorted({
+        request.patient_id for request in requests
+        if profiles.get(request.patient_id, {}).get('role') != 'patient'
+    })
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"No patient accounts with ids {unknown[:20]}")
+    return [(request.patient_id, profiles[request.patient_id]['email']) for request in requests]
+
+def get_risk_level(probability, threshold=DEFAULT_THRESHOLD):
+    """
+    Map a stroke probability to a risk level and message
+
+    The bands scale with the decision threshold (0.3 and 0.6 at the default
+    0.5), so a row labelled 1 is never reported as Low risk and a row
+    labelled 0 never as High.
+    """
+    if probability < 0.6 * threshold:
+        return "Low", "Low risk of stroke based on the provided data."
+    elif probability < threshold + 0.2 * (1 - threshold):
+        return "Moderate", "Moderate risk of stroke. Consider lifestyle changes and regular check-ups."
+    return "High", "High risk of stroke. Please consult with a healthcare professional."
+
+def score_records(artifact, input_data):
+    """
+    Encode input dicts and score them with one predict_proba call
+
+    The label comes from the same probabilities via the artifact's decision
+    threshold, so the forest is walked once per request. A probability equal
+    to the threshold is labelled 0, as predict() does for a 0.5 tie.
+    """
+    model = artifact['model']
+    X = encode_records(input_data, artifact['preprocessor'])
+    probabilities = model.predict_proba(X)[:, 1]
+    predictions = model.classes_.take((probabilities > artifact['threshold']).astype(np.intp))
+    return predictions, probabilities
+
+# Repeat submissions of the same form skip preprocessing and the model entirely
+prediction_cache = TTLCache(
+    maxsize=int(os.getenv('prediction_cache_size') or 10000),
+    ttl=float(os.getenv('prediction_cache_ttl') or 3600)
+)
+model_registry.add_swap_listener(lambda version: prediction_cache.clear())
+
+def prediction_cache_key(input_data):
+    """Hash of the canonical request fields plus the model version that scores them"""
+    canonical = json.dumps(input_data, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(f"{model_registry.version}:{canonical}".encode('utf-8')).hexdigest()
+
+def score_with_current_model(input_data):
+    return score_records(model_registry.get_artifact(), input_data)
+
+# Concurrent /predict calls are scored together, one model call per window
+predict_batcher = MicroBatcher(
+    score_with_current_model,
+    max_batch_size=int(os.getenv('predict_batch_size') or 32),
+    max_wait=float(os.getenv('predict_batch_wait_ms') or 2) / 1000
+)
 
 @api.post('/predict', response_model=StrokePredictionResponse)
 async def predict_stroke( request: StrokePredictionRequest, token_payload: dict = Depends(verify_token)):
@@ -48,68 +163,30 @@ async def predict_stroke( request: StrokePredictionRequest, token_payload: dict
         
         print(token_payload)
 
-        model = load_model()
-
-        input_dict = {
-            'id': [0],
-            'gender': [request.gender],
-            'age': [request.age],
-            'hypertension': [request.hypertension],
-            'heart_disease': [request.heart_disease],
-            'ever_married': [request.ever_married],
-            'work_type': [request.work_type],
-            'Residence_type': [request.Residence_type],
-            'avg_glucose_level': [request.avg_glucose_level],
-            'bmi': [request.bmi if request.bmi is not None else np.nan],
-            'smoking_status': [request.smoking_status],
-            'stroke': [0] 
-        }
-        
-        df = pd.DataFrame(input_dict)
-        preprocessed_df = preprocess_data(df)
-        
-        X_preprocessed = preprocessed_df.drop('stroke', axis=1)
-        
-        prediction = model.predict(X_preprocessed)[0]
-        probability = model.predict_proba(X_preprocessed)[0][1]
-        
-        if probability < 0.3:
-            risk_level = "Low"
-            message = "Low risk of stroke based on the provided data."
-        elif probability < 0.6:
-            risk_level = "Moderate"
-            message = "Moderate risk of stroke. Consider lifestyle changes and regular check-ups."
+        input_data = request.model_dump()
+        cache_key = prediction_cache_key(input_data)
+        cached = prediction_cache.get(cache_key)
+        if cached is None:
+            prediction, probability = await predict_batcher.submit(input_data)
+            prediction_cache.set(cache_key, (int(prediction), float(probability)))
         else:
-            risk_level = "High"
-            message = "High risk of stroke. Please consult with a healthcare professional."
+            prediction, probability = cached
+        
+        risk_level, message = get_risk_level(probability, model_registry.get_artifact()['threshold'])
         
         try:
-            user_id = token_payload.get("id")
-            user_email = token_payload.get("email", "")
-            
-            input_data = {
-                "gender": request.gender,
-                "age": request.age,
-                "hypertension": request.hypertension,
-                "heart_disease": request.heart_disease,
-                "ever_married": request.ever_married,
-                "work_type": request.work_type,
-                "Residence_type": request.Residence_type,
-                "avg_glucose_level": request.avg_glucose_level,
-                "bmi": request.bmi,
-                "smoking_status": request.smoking_status
-            }
-            
-            save_stroke_prediction(
-                user_id=user_id,
-                user_email=user_email,
-                input_data=input_data,
-                prediction=int(prediction),
-                probability=float(probability),
-                risk_level=risk_level
+            document = build_stroke_document(
+                token_payload.get("id"),
+                token_payload.get("email", ""),
+                input_data,
+                int(prediction),
+                float(probability),
+                risk_level
             )
+            # Written behind the response; only waits here if the write queue is full
+            await run_blocking(prediction_writer.submit, [document])
         except Exception as e:
-            print(f"Warning: Failed to save stroke prediction to MongoDB: {str(e)}")
+            print(f"Warning: Failed to queue stroke prediction for saving: {str(e)}")
         
         return {
             'success': True,
@@ -124,3 +201,101 @@ async def predict_stroke( request: StrokePredictionRequest, token_payload: dict
         print(e)
         raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
 
+
+@api.post('/predict/batch', response_model=BatchPredictionResponse)
+async def predict_stroke_batch(
+    requests: List[CohortPredictionRequest],
+    token_payload: dict = Depends(verify_token),
+    db = Depends(get_db)
+):
+    """
+    Score a cohort of patients with a single vectorized model call
+
+    Doctors (e.g. a clinic uploading its patients) tag each row with the
+    patient's user id and the prediction is saved to that patient; a patient
+    may only submit rows for themselves.
+    """
+    try:
+        if token_payload.get("role") not in ('patient', 'doctor'):
+            raise HTTPException(status_code=400, detail = "You are not authorized to use this endpoint because you are not a patient or doctor")
+
+        if not requests:
+            raise HTTPException(status_code=400, detail="At least one prediction request is required")
+        if len(requests) > MAX_BATCH_SIZE:
+            raise HTTPException(status_code=413, detail=f"A batch can contain at most {MAX_BATCH_SIZE} prediction requests")
+
+        owners = await run_blocking(resolve_cohort_owners, db, token_payload, requests)
+        input_data = [request.model_dump(exclude={'patient_id'}) for request in requests]
+        cache_keys = [prediction_cache_key(data) for data in input_data]
+        scored = [prediction_cache.get(key) for key in cache_keys]
+
+        misses = [i for i, result in enumerate(scored) if result is None]
+        if misses:
+            miss_predictions, miss_probabilities = await run_blocking(
+                score_with_current_model, [input_data[i] for i in misses]
+            )
+            for i, prediction, probability in zip(misses, miss_predictions, miss_probabilities):
+                scored[i] = (int(prediction), float(probability))
+                prediction_cache.set(cache_keys[i], scored[i])
+
+        predictions = [prediction for prediction, _ in scored]
+        stroke_probabilities = [probability for _, probability in scored]
+
+        threshold = model_registry.get_artifact()['threshold']
+        results = []
+        documents = []
+        for (user_id, email), data, prediction, probability in zip(owners, input_data, predictions, stroke_probabilities):
+            risk_level, message = get_risk_level(probability, threshold)
+            results.append({
+                'success': True,
+                'prediction': int(prediction),
+                'probability': float(probability),
+                'risk_level': risk_level,
+                'message': message
+            })
+            documents.append(build_stroke_document(
+                user_id,
+                email,
+                data,
+                int(prediction),
+                float(probability),
+                risk_level
+            ))
+
+        try:
+            await run_blocking(prediction_writer.submit, documents)
+        except Exception as e:
+            print(f"Warning: Failed to queue stroke predictions for saving: {str(e)}")
+
+        return {
+            'success': True,
+            'count': len(results),
+            'results': results
+        }
+    except HTTPException:
+        raise
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        print(e)
+        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+
+
+@api.get('/history', response_model=PredictionHistoryResponse)
+async def get_prediction_history_for_patient(
+    page_size: int = Query(20, ge=1, le=100, description="Number of items per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor or prev_cursor from a previous page"),
+    token_payload: dict = Depends(verify_token)
+):
+    """The signed-in patient's own predictions, newest first"""
+    try:
+        if token_payload.get("role") != 'patient':
+            raise HTTPException(status_code=400, detail = "You are not authorized to use this endpoint because you are not a patient")
+
+        user_id = token_payload.get("id")
+        page_data = await run_blocking(get_prediction_history, user_id, page_size, cursor)
+        return build_history_response(user_id, page_size, page_data)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving prediction history: {str(e)}")
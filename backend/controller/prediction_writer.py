@@ -0,0 +1,249 @@
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from bson import ObjectId, json_util
+from dotenv import load_dotenv
+from .stroke_data_service import insert_stroke_documents
+
+try:
+    import fcntl
+except ImportError:
+    # Windows has no gunicorn workers, so one process owns the spill file
+    fcntl = None
+
+load_dotenv()
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@contextmanager
+def file_lock(path: str, blocking: bool = True):
+    """
+    Exclusive lock shared by every process using path
+
+    Yields False instead of waiting when blocking is off and another process
+    holds the lock.
+    """
+    if fcntl is None:
+        yield True
+        return
+    with open(path, 'a') as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class PredictionWriter:
+    """
+    Write-behind queue for prediction documents
+
+    Requests enqueue documents and return; one background thread drains the
+    queue and writes it with insert_many whenever batch_size documents are
+    waiting or flush_interval seconds have passed. The queue is bounded: when
+    it is full, a submit call blocks for up to enqueue_timeout seconds in
+    total, then writes the rest of its documents to the spill file rather
+    than dropping them. Batches that fail to insert are spilled as well, and
+    the spill file is replayed once Mongo accepts writes again. stop() drains
+    everything still queued.
+
+    Every gunicorn worker shares the spill file, so appends and the replay
+    hand-off take a file lock next to it, and one worker replays at a time.
+    """
+
+    def __init__(
+        self,
+        spill_path: str,
+        max_queue: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        enqueue_timeout: float = 2.0,
+        replay_interval: float = 30.0
+    ):
+        self.spill_path = spill_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.replay_interval = replay_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._spill_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._last_replay = 0.0
+        self._stats = {
+            'enqueued': 0,
+            'written': 0,
+            'flushes': 0,
+            'failed_flushes': 0,
+            'spilled': 0,
+            'replayed': 0
+        }
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def submit(self, documents):
+        """
+        Queue prediction documents for writing; blocks only while the queue is full
+
+        Each document gets its _id here so a retried batch can never insert it twice.
+        """
+        deadline = time.monotonic() + self.enqueue_timeout
+        for i, document in enumerate(documents):
+            document.setdefault('_id', ObjectId())
+            try:
+                self._queue.put(document, timeout=max(0.0, deadline - time.monotonic()))
+                self._count('enqueued')
+            except queue.Full:
+                rest = documents[i:]
+                for pending in rest:
+                    pending.setdefault('_id', ObjectId())
+                print(f"Warning: Prediction write queue is full, spilling {len(rest)} predictions to disk")
+                self._spill(rest)
+                return
+
+    @contextmanager
+    def _locked_spill(self):
+        with self._spill_lock, file_lock(f"{self.spill_path}.lock"):
+            yield
+
+    def _spill(self, documents):
+        if not documents:
+            return
+        with self._locked_spill():
+            with open(self.spill_path, 'a') as f:
+                for document in documents:
+                    f.write(json_util.dumps(document) + '\n')
+        self._count('spilled', len(documents))
+
+    def _flush(self, batch) -> bool:
+        try:
+            self._count('written', insert_stroke_documents(batch))
+            self._count('flushes')
+            return True
+        except Exception as e:
+            print(f"Warning: Failed to write {len(batch)} predictions, spilling to disk: {str(e)}")
+            self._count('failed_flushes')
+            self._spill(batch)
+            return False
+
+    def replay_spill(self):
+        """
+        Re-insert spilled documents; whatever still fails is spilled again
+
+        The .replay file is removed only once every document in it has been
+        inserted or spilled again, so a replay killed halfway is finished by
+        the next one. Documents that already landed are skipped by _id.
+        """
+        replay_path = f"{self.spill_path}.replay"
+        with file_lock(f"{replay_path}.lock", blocking=False) as acquired:
+            if not acquired:
+                # Another worker is replaying
+                return
+
+            with self._locked_spill():
+                # A leftover .replay file means a previous replay was interrupted; finish it first
+                if not os.path.exists(replay_path):
+                    if not os.path.exists(self.spill_path):
+                        return
+                    os.replace(self.spill_path, replay_path)
+
+            documents = []
+            with open(replay_path) as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        documents.append(json_util.loads(line))
+                    except ValueError:
+                        # A line cut short when a process died mid-append
+                        print(f"Warning: Skipping unreadable spilled prediction: {line[:80]!r}")
+
+            for start in range(0, len(documents), self.batch_size):
+                batch = documents[start:start + self.batch_size]
+                if not self._flush(batch):
+                    # _flush spilled the failed batch; keep the rest with it
+                    self._spill(documents[start + self.batch_size:])
+                    break
+                self._count('replayed', len(batch))
+
+            os.remove(replay_path)
+
+    def _next_batch(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            batch = self._next_batch()
+            flushed = self._flush(batch) if batch else True
+            if flushed and time.monotonic() - self._last_replay >= self.replay_interval:
+                self._last_replay = time.monotonic()
+                try:
+                    self.replay_spill()
+                except Exception as e:
+                    print(f"Warning: Failed to replay spilled predictions: {str(e)}")
+        self._drain()
+
+    def _drain(self):
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+                batch = []
+        if batch:
+            self._flush(batch)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name='prediction-writer', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the flush loop and write out everything still queued"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        return {
+            **stats,
+            'queued': self._queue.qsize(),
+            'max_queue': self._queue.maxsize,
+            'spill_pending': os.path.exists(self.spill_path) or os.path.exists(f"{self.spill_path}.replay")
+        }
+
+
+prediction_writer = PredictionWriter(
+    os.getenv('prediction_spill_path') or os.path.join(backend_dir, 'prediction_spill.jsonl'),
+    max_queue=int(os.getenv('prediction_queue_size') or 10000),
+    batch_size=int(os.getenv('prediction_batch_size') or 500),
+    flush_interval=float(os.getenv('prediction_flush_interval') or 1.0),
+    enqueue_timeout=float(os.getenv('prediction_enqueue_timeout') or 2.0)
+)
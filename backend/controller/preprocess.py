@@ -1,48 +1,190 @@
 import pandas as pd
 import numpy as np
-import os
-import pickle
-from sklearn.preprocessing import LabelEncoder, StandardScaler
-from sklearn.impute import SimpleImputer
-
-def preprocess_data(df):
-    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    dataset_path = os.path.join(backend_dir, 'dataset.csv')
-    
-    # df = pd.read_csv(dataset_path)
-    print(type(df))
-    
-    X = df.drop(['id', 'stroke'], axis=1)
-    y = df['stroke']
-    
-    if 'bmi' in X.columns:
-        X['bmi'] = X['bmi'].replace('N/A', np.nan)
-        X['bmi'] = pd.to_numeric(X['bmi'], errors='coerce')
-    
-    categorical_cols = X.select_dtypes(include=['object']).columns.tolist()
-    
-    label_encoders = {}
-    for col in categorical_cols:
-        le = LabelEncoder()
-        X[col] = le.fit_transform(X[col].astype(str))
-        label_encoders[col] = le
-    
-    X = X.apply(pd.to_numeric, errors='coerce')
-    
-    imputer = SimpleImputer(strategy='mean')
-    X_imputed = imputer.fit_transform(X)
-    X = pd.DataFrame(X_imputed, columns=X.columns)
-        
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
-    X_scaled = pd.DataFrame(X_scaled, columns=X.columns)
-    
-    preprocessed_df = pd.concat([X_scaled, y], axis=1)
-        
-    processed_data_dir = backend_dir
-    preprocessed_path = os.path.join(processed_data_dir, 'preprocessed_data.csv')
-    
-    preprocessed_df.to_csv(preprocessed_path, index=False)
-
-    return preprocessed_df
 
+FEATURE_COLUMNS = [
+    'gender', 'age', 'hypertension', 'heart_disease', 'ever_married',
+    'work_type', 'Residence_type', 'avg_glucose_level', 'bmi', 'smoking_status'
+]
+CATEGORICAL_COLUMNS = ['gender', 'ever_married', 'work_type', 'Residence_type', 'smoking_status']
+TARGET_COLUMN = 'stroke'
+# Bump whenever the encoding changes so cached training matrices are rebuilt
+PREPROCESS_VERSION = 1
+
+# Explicit dtypes so chunks parse identically and categoricals stay compact
+DATASET_DTYPES = {
+    'id': 'int64',
+    'gender': 'category',
+    'age': 'float64',
+    'hypertension': 'int8',
+    'heart_disease': 'int8',
+    'ever_married': 'category',
+    'work_type': 'category',
+    'Residence_type': 'category',
+    'avg_glucose_level': 'float64',
+    'bmi': 'float64',
+    'smoking_status': 'category',
+    'stroke': 'int8'
+}
+DEFAULT_CHUNK_SIZE = 100_000
+
+def read_dataset_chunks(csv_path, chunksize=DEFAULT_CHUNK_SIZE, skip_rows=0):
+    """Stream the stroke CSV in chunks with explicit dtypes, never holding the whole file"""
+    return pd.read_csv(
+        csv_path,
+        dtype=DATASET_DTYPES,
+        na_values=['N/A'],
+        chunksize=chunksize,
+        skiprows=range(1, skip_rows + 1) if skip_rows else None
+    )
+
+def _clean_features(df):
+    X = df[FEATURE_COLUMNS].copy()
+    X['bmi'] = pd.to_numeric(X['bmi'].replace('N/A', np.nan), errors='coerce')
+    return X
+
+def _category_labels(series):
+    # Same labels LabelEncoder saw: missing values become the string 'nan'
+    return series.astype(object).astype(str)
+
+def _encode_frame(X, category_maps):
+    encoded = np.empty((len(X), len(FEATURE_COLUMNS)), dtype=np.float64)
+    for j, col in enumerate(FEATURE_COLUMNS):
+        if col in category_maps:
+            encoded[:, j] = _category_labels(X[col]).map(category_maps[col]).to_numpy(dtype=np.float64, na_value=np.nan)
+        else:
+            encoded[:, j] = pd.to_numeric(X[col], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    return encoded
+
+def _impute_and_scale(encoded, preprocessor):
+    missing = np.isnan(encoded)
+    if missing.any():
+        encoded[missing] = np.take(preprocessor['impute_means'], np.nonzero(missing)[1])
+    encoded -= preprocessor['scaler_mean']
+    encoded /= preprocessor['scaler_scale']
+    return encoded
+
+def _merge_moments(count_a, mean_a, m2_a, count_b, mean_b, m2_b):
+    # Chan et al. pairwise update, so chunked means/variances match a single pass
+    count = count_a + count_b
+    safe_count = np.where(count > 0, count, 1)
+    delta = mean_b - mean_a
+    mean = mean_a + delta * count_b / safe_count
+    m2 = m2_a + m2_b + delta ** 2 * count_a * count_b / safe_count
+    return count, mean, m2
+
+def fit_preprocessor_from_chunks(chunks):
+    """
+    Fit the preprocessing transform in one streaming pass over DataFrame chunks
+
+    Category maps match LabelEncoder (sorted classes), imputation uses column
+    means and scaling matches StandardScaler applied after imputation, so the
+    artifact reproduces the training-time encoding exactly.
+    """
+    numeric_columns = [col for col in FEATURE_COLUMNS if col not in CATEGORICAL_COLUMNS]
+    category_counts = {col: {} for col in CATEGORICAL_COLUMNS}
+    count = np.zeros(len(numeric_columns))
+    mean = np.zeros(len(numeric_columns))
+    m2 = np.zeros(len(numeric_columns))
+    n_samples = 0
+
+    for chunk in chunks:
+        X = _clean_features(chunk)
+        n_samples += len(X)
+
+        for col in CATEGORICAL_COLUMNS:
+            for label, label_count in _category_labels(X[col]).value_counts().items():
+                category_counts[col][label] = category_counts[col].get(label, 0) + int(label_count)
+
+        values = X[numeric_columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        chunk_count = (~np.isnan(values)).sum(axis=0)
+        with np.errstate(invalid='ignore'):
+            chunk_mean = np.where(chunk_count > 0, np.nansum(values, axis=0) / np.maximum(chunk_count, 1), 0.0)
+        chunk_m2 = np.nansum((values - chunk_mean) ** 2, axis=0)
+        count, mean, m2 = _merge_moments(count, mean, m2, chunk_count, chunk_mean, chunk_m2)
+
+    if n_samples == 0:
+        raise ValueError("Cannot fit the preprocessor on an empty dataset")
+
+    category_maps = {
+        col: {label: i for i, label in enumerate(sorted(category_counts[col]))}
+        for col in CATEGORICAL_COLUMNS
+    }
+
+    impute_means = np.empty(len(FEATURE_COLUMNS))
+    scaler_scale = np.empty(len(FEATURE_COLUMNS))
+    for j, col in enumerate(FEATURE_COLUMNS):
+        if col in category_maps:
+            codes = np.array([category_maps[col][label] for label in category_counts[col]], dtype=np.float64)
+            weights = np.array(list(category_counts[col].values()), dtype=np.float64)
+            col_mean = np.dot(codes, weights) / n_samples
+            col_var = np.dot((codes - col_mean) ** 2, weights) / n_samples
+        else:
+            k = numeric_columns.index(col)
+            col_mean = mean[k] if count[k] > 0 else np.nan
+            # Imputed entries sit exactly on the mean and add no variance
+            col_var = m2[k] / n_samples
+        impute_means[j] = col_mean
+        scaler_scale[j] = np.sqrt(col_var)
+
+    scaler_scale[~(scaler_scale > 0)] = 1.0
+
+    return {
+        'feature_columns': list(FEATURE_COLUMNS),
+        'category_maps': category_maps,
+        'impute_means': impute_means,
+        'scaler_mean': impute_means.copy(),
+        'scaler_scale': scaler_scale,
+        'n_samples_seen': n_samples
+    }
+
+def fit_preprocessor(df):
+    """Fit the preprocessing transform on an in-memory DataFrame"""
+    return fit_preprocessor_from_chunks([df])
+
+def transform_frame(df, preprocessor):
+    """Apply a fitted preprocessor to a DataFrame and return the feature matrix"""
+    encoded = _encode_frame(_clean_features(df), preprocessor['category_maps'])
+    return _impute_and_scale(encoded, preprocessor)
+
+def transform_chunks(chunks, preprocessor, n_rows=None, dtype=np.float32):
+    """
+    Encode DataFrame chunks straight into one preallocated feature matrix
+
+    Peak memory is the output arrays plus a single chunk; no full-frame
+    DataFrame or intermediate file is created. float32 is what the forest
+    trains on internally, so nothing is lost.
+
+    Returns:
+        tuple: (X, y) arrays
+    """
+    n_rows = preprocessor['n_samples_seen'] if n_rows is None else n_rows
+    X = np.empty((n_rows, len(FEATURE_COLUMNS)), dtype=dtype)
+    y = np.empty(n_rows, dtype=np.int8)
+
+    offset = 0
+    for chunk in chunks:
+        end = offset + len(chunk)
+        if end > n_rows:
+            raise ValueError("Dataset has more rows than the preprocessor was fitted on")
+        X[offset:end] = transform_frame(chunk, preprocessor)
+        y[offset:end] = chunk[TARGET_COLUMN].to_numpy()
+        offset = end
+
+    return X[:offset], y[:offset]
+
+def encode_records(records, preprocessor):
+    """
+    Inference path: apply a fitted preprocessor to a list of input dicts
+
+    Pure NumPy, no fitting and no file I/O. Unknown categories and missing
+    values are imputed with the training means.
+    """
+    category_maps = preprocessor['category_maps']
+    encoded = np.empty((len(records), len(FEATURE_COLUMNS)), dtype=np.float64)
+    for j, col in enumerate(FEATURE_COLUMNS):
+        if col in category_maps:
+            mapping = category_maps[col]
+            encoded[:, j] = [mapping.get(str(record.get(col)), np.nan) for record in records]
+        else:
+            encoded[:, j] = [np.nan if record.get(col) is None else record.get(col) for record in records]
+    return _impute_and_scale(encoded, preprocessor)
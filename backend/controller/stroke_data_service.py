@@ -1,29 +1,191 @@
-from datetime import datetime
-from typing import Optional, Dict, Any
-from database.mongodb_connection import stroke_collection
+from datetime import datetime, date, timedelta
+from typing import Optional, Dict, Any, List
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from database.mongodb_connection import stroke_collection, stats_collection, patients_collection
 from fastapi import HTTPException
+import base64
+import json
+import os
+import time
 
-def save_stroke_prediction(
+def build_stroke_document(
     user_id: int,
     user_email: str,
     input_data: Dict[str, Any],
     prediction: int,
     probability: float,
     risk_level: str
-) -> str:
+) -> Dict[str, Any]:
+    """Build the MongoDB document stored for one stroke prediction"""
+    now = datetime.utcnow()
+    return {
+        "user_id": user_id,
+        "user_email": user_email,
+        "input_data": {
+            "gender": input_data.get("gender"),
+            "age": input_data.get("age"),
+            "hypertension": input_data.get("hypertension"),
+            "heart_disease": input_data.get("heart_disease"),
+            "ever_married": input_data.get("ever_married"),
+            "work_type": input_data.get("work_type"),
+            "Residence_type": input_data.get("Residence_type"),
+            "avg_glucose_level": input_data.get("avg_glucose_level"),
+            "bmi": input_data.get("bmi"),
+            "smoking_status": input_data.get("smoking_status")
+        },
+        "prediction": {
+            "result": prediction,
+            "probability": probability,
+            "risk_level": risk_level
+        },
+        "created_at": now,
+        "updated_at": now
+    }
+
+def insert_stroke_documents(documents: List[Dict[str, Any]]) -> int:
     """
-    Save stroke prediction data to MongoDB
+    Insert prediction documents with one unordered insert_many and count them in the stats
+    
+    Documents carry their _id from enqueue time, so replaying a batch that
+    partly landed before a failure skips the duplicates instead of failing.
     
     Args:
-        user_id: User ID from token
-        user_email: User email from token
-        input_data: Input data used for prediction
-        prediction: Prediction result (0 or 1)
-        probability: Prediction probability
-        risk_level: Risk level (Low, Moderate, High)
+        documents: Documents built by build_stroke_document, each with an _id
     
     Returns:
-        str: ID of the inserted document
+        int: Number of documents newly inserted
+    """
+    if stroke_collection is None:
+        raise ConnectionError("MongoDB connection not available")
+    
+    if not documents:
+        return 0
+    
+    token = begin_risk_stats_write(documents)
+    inserted = []
+    try:
+        stroke_collection.insert_many(documents, ordered=False)
+        inserted = documents
+    except BulkWriteError as e:
+        write_errors = e.details.get("writeErrors", [])
+        if any(error.get("code") != 11000 for error in write_errors):
+            raise
+        duplicates = {error["index"] for error in write_errors}
+        inserted = [doc for i, doc in enumerate(documents) if i not in duplicates]
+    finally:
+        # On a failed insert this only clears the token; reconcile counts whatever landed
+        increment_risk_stats(inserted, token)
+    
+    return len(inserted)
+
+def encode_cursor(document: Dict[str, Any], direction: str) -> str:
+    """Build an opaque cursor pointing at a document's (created_at, _id) position"""
+    payload = {
+        "t": document["created_at"].isoformat(),
+        "id": str(document["_id"]),
+        "d": direction
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str):
+    """Decode a cursor into (created_at, _id, direction)"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        direction = payload["d"]
+        if direction not in ("next", "prev"):
+            raise ValueError(direction)
+        return datetime.fromisoformat(payload["t"]), ObjectId(payload["id"]), direction
+    except (ValueError, KeyError, TypeError, InvalidId):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+def find_page(
+    query: Dict[str, Any],
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    projection: Optional[Dict[str, Any]] = None,
+    hint: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Fetch one page of predictions, newest first
+    
+    With a cursor the page is an index seek on (created_at, _id), so deep
+    pages cost the same as the first one. Without a cursor, skip gives
+    offset pagination.
+    
+    Args:
+        query: MongoDB filter
+        limit: Page size
+        cursor: Opaque next/prev cursor from a previous page
+        skip: Offset, only used without a cursor
+        projection: Fields to return
+        hint: Name of the index to use
+    
+    Returns:
+        dict: items, next_cursor and prev_cursor
+    """
+    direction = "next"
+    if cursor:
+        created_at, last_id, direction = decode_cursor(cursor)
+        op = "$lt" if direction == "next" else "$gt"
+        query = {"$and": [query, {"$or": [
+            {"created_at": {op: created_at}},
+            {"created_at": created_at, "_id": {op: last_id}}
+        ]}]}
+        skip = 0
+    
+    order = -1 if direction == "next" else 1
+    documents = stroke_collection.find(query, projection).sort([("created_at", order), ("_id", order)])
+    if hint:
+        documents = documents.hint(hint)
+    documents = list(documents.skip(skip).limit(limit + 1))
+    
+    has_more = len(documents) > limit
+    documents = documents[:limit]
+    if direction == "prev":
+        documents.reverse()
+    
+    next_cursor = None
+    prev_cursor = None
+    if documents:
+        if direction == "next":
+            has_next, has_prev = has_more, bool(cursor) or skip > 0
+        else:
+            has_next, has_prev = True, has_more
+        if has_next:
+            next_cursor = encode_cursor(documents[-1], "next")
+        if has_prev:
+            prev_cursor = encode_cursor(documents[0], "prev")
+    
+    for document in documents:
+        document["_id"] = str(document["_id"])
+    
+    return {
+        "items": documents,
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor
+    }
+
+def get_stroke_predictions_by_user(
+    user_id: int,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    projection: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Get stroke predictions for a specific user, newest first
+    
+    Args:
+        user_id: User ID
+        limit: Maximum number of records to return
+        cursor: Opaque next/prev cursor from a previous page
+        projection: Fields to return (must keep created_at for the cursors)
+    
+    Returns:
+        dict: items (stroke prediction documents), next_cursor and prev_cursor
     """
     if stroke_collection is None:
         raise HTTPException(
@@ -32,49 +194,62 @@ def save_stroke_prediction(
         )
     
     try:
-        stroke_document = {
-            "user_id": user_id,
-            "user_email": user_email,
-            "input_data": {
-                "gender": input_data.get("gender"),
-                "age": input_data.get("age"),
-                "hypertension": input_data.get("hypertension"),
-                "heart_disease": input_data.get("heart_disease"),
-                "ever_married": input_data.get("ever_married"),
-                "work_type": input_data.get("work_type"),
-                "Residence_type": input_data.get("Residence_type"),
-                "avg_glucose_level": input_data.get("avg_glucose_level"),
-                "bmi": input_data.get("bmi"),
-                "smoking_status": input_data.get("smoking_status")
-            },
-            "prediction": {
-                "result": prediction,
-                "probability": probability,
-                "risk_level": risk_level
-            },
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
-        }
-        
-        result = stroke_collection.insert_one(stroke_document)
-        return str(result.inserted_id)
+        return find_page({"user_id": user_id}, limit, cursor=cursor, projection=projection)
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
-            detail=f"Failed to save stroke prediction data: {str(e)}"
+            detail=f"Failed to retrieve stroke predictions: {str(e)}"
         )
 
-def get_stroke_predictions_by_user(user_id: int, limit: int = 100) -> list:
+# What a history view shows; user_id/user_email are implied by the route
+HISTORY_PROJECTION = {"input_data": 1, "prediction": 1, "created_at": 1}
+
+def get_prediction_history(user_id: int, limit: int = 20, cursor: Optional[str] = None) -> Dict[str, Any]:
     """
-    Get stroke predictions for a specific user
+    One page of a patient's prediction history, served by the user_id_created_at index
     
     Args:
         user_id: User ID
+        limit: Page size
+        cursor: Opaque next/prev cursor from a previous page
+    
+    Returns:
+        dict: items (prediction_id, input_data, prediction, created_at), next_cursor and prev_cursor
+    """
+    page = get_stroke_predictions_by_user(user_id, limit=limit, cursor=cursor, projection=HISTORY_PROJECTION)
+    page["items"] = [
+        {
+            "prediction_id": document["_id"],
+            "input_data": document.get("input_data", {}),
+            "prediction": document.get("prediction", {}),
+            "created_at": document["created_at"].isoformat()
+        }
+        for document in page["items"]
+    ]
+    return page
+
+def get_all_stroke_predictions(
+    limit: int = 100,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+    query: Optional[Dict[str, Any]] = None,
+    hint: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Get all stroke predictions, newest first (admin function)
+    
+    Args:
         limit: Maximum number of records to return
+        skip: Number of records to skip when no cursor is given
+        cursor: Opaque next/prev cursor from a previous page
+        query: MongoDB filter, e.g. from build_prediction_filter
+        hint: Name of the index that serves the filter
     
     Returns:
-        list: List of stroke prediction documents
+        dict: items (stroke prediction documents), next_cursor and prev_cursor
     """
     if stroke_collection is None:
         raise HTTPException(
@@ -83,33 +258,77 @@ def get_stroke_predictions_by_user(user_id: int, limit: int = 100) -> list:
         )
     
     try:
-        predictions = stroke_collection.find(
-            {"user_id": user_id}
-        ).sort("created_at", -1).limit(limit)
-        
-        result = []
-        for pred in predictions:
-            pred["_id"] = str(pred["_id"])
-            result.append(pred)
-        
-        return result
+        return find_page(query or {}, limit, cursor=cursor, skip=skip, hint=hint)
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Failed to retrieve stroke predictions: {str(e)}"
         )
 
-def get_all_stroke_predictions(limit: int = 100) -> list:
+RISK_LEVELS = ["Low", "Moderate", "High"]
+CONDITION_VALUES = [0, 1]
+
+def build_prediction_filter(
+    risk_level: Optional[str] = None,
+    min_age: Optional[float] = None,
+    max_age: Optional[float] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    hypertension: Optional[int] = None,
+    heart_disease: Optional[int] = None
+):
     """
-    Get all stroke predictions (admin function)
+    Translate dashboard filters into a stroke_data query and the index that serves it
+    
+    Condition or age filters use risk_conditions_created_at_age. Its equality
+    fields that weren't filtered on become $in over every value they take, so
+    the query still matches the full index prefix and MongoDB merges the small
+    per-value scans in created_at order instead of sorting in memory.
     
     Args:
-        limit: Maximum number of records to return
+        risk_level: Low, Moderate or High
+        min_age: Inclusive lower bound on input_data.age
+        max_age: Inclusive upper bound on input_data.age
+        start_date: First day included (UTC)
+        end_date: Last day included (UTC)
+        hypertension: 0 or 1
+        heart_disease: 0 or 1
     
     Returns:
-        list: List of all stroke prediction documents
+        tuple: (query, index name)
     """
+    query = {}
+    
+    if start_date is not None or end_date is not None:
+        query["created_at"] = {}
+        if start_date is not None:
+            query["created_at"]["$gte"] = datetime.combine(start_date, datetime.min.time())
+        if end_date is not None:
+            query["created_at"]["$lt"] = datetime.combine(end_date + timedelta(days=1), datetime.min.time())
+    
+    if hypertension is not None or heart_disease is not None or min_age is not None or max_age is not None:
+        query["prediction.risk_level"] = risk_level if risk_level else {"$in": RISK_LEVELS}
+        query["input_data.hypertension"] = hypertension if hypertension is not None else {"$in": CONDITION_VALUES}
+        query["input_data.heart_disease"] = heart_disease if heart_disease is not None else {"$in": CONDITION_VALUES}
+        if min_age is not None or max_age is not None:
+            query["input_data.age"] = {}
+            if min_age is not None:
+                query["input_data.age"]["$gte"] = min_age
+            if max_age is not None:
+                query["input_data.age"]["$lte"] = max_age
+        return query, "risk_conditions_created_at_age"
+    
+    if risk_level:
+        query["prediction.risk_level"] = risk_level
+        return query, "risk_level_created_at"
+    
+    return query, "created_at"
+
+def count_stroke_predictions(query: Dict[str, Any], hint: Optional[str] = None) -> int:
+    """Count predictions matching a filter, walking only the hinted index"""
     if stroke_collection is None:
         raise HTTPException(
             status_code=500,
@@ -117,20 +336,333 @@ def get_all_stroke_predictions(limit: int = 100) -> list:
         )
     
     try:
-        predictions = stroke_collection.find().sort("created_at", -1).limit(limit)
+        if hint:
+            return stroke_collection.count_documents(query, hint=hint)
+        return stroke_collection.count_documents(query)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to count stroke predictions: {str(e)}"
+        )
+
+def _plan_index_names(plan) -> List[str]:
+    if isinstance(plan, dict):
+        names = [plan["indexName"]] if "indexName" in plan else []
+        for value in plan.values():
+            names.extend(_plan_index_names(value))
+        return names
+    if isinstance(plan, list):
+        return [name for item in plan for name in _plan_index_names(item)]
+    return []
+
+def explain_page_query(query: Dict[str, Any], limit: int, hint: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Report how MongoDB executes a dashboard page query (debug mode)
+    
+    Returns:
+        dict: filter, hinted and used index names, and keys/docs examined
+    """
+    try:
+        cursor = stroke_collection.find(query).sort([("created_at", -1), ("_id", -1)])
+        if hint:
+            cursor = cursor.hint(hint)
+        plan = cursor.limit(limit + 1).explain()
+        stats = plan.get("executionStats", {})
+        return {
+            "filter": json.loads(json.dumps(query, default=str)),
+            "hint": hint,
+            "indexes_used": sorted(set(_plan_index_names(plan.get("queryPlanner", {}).get("winningPlan", {})))),
+            "keys_examined": stats.get("totalKeysExamined"),
+            "docs_examined": stats.get("totalDocsExamined"),
+            "returned": stats.get("nReturned")
+        }
+    except Exception as e:
+        return {"filter": json.loads(json.dumps(query, default=str)), "hint": hint, "error": str(e)}
+
+def get_risk_summary() -> Dict[str, int]:
+    """
+    Count predictions per risk level and distinct patients in one $facet aggregation
+    
+    Returns:
+        dict: total_predictions, total_patients, high_risk_count,
+              moderate_risk_count and low_risk_count
+    """
+    if stroke_collection is None:
+        raise HTTPException(
+            status_code=500,
+            detail="MongoDB connection not available"
+        )
+    
+    try:
+        pipeline = [
+            {"$facet": {
+                "risk_levels": [
+                    {"$group": {"_id": "$prediction.risk_level", "count": {"$sum": 1}}}
+                ],
+                "patients": [
+                    {"$match": {"user_id": {"$ne": None}}},
+                    {"$group": {"_id": "$user_id"}},
+                    {"$count": "count"}
+                ]
+            }}
+        ]
+        facets = next(stroke_collection.aggregate(pipeline), {})
+        
+        risk_counts = {row["_id"]: row["count"] for row in facets.get("risk_levels", [])}
+        patients = facets.get("patients", [])
         
-        result = []
-        for pred in predictions:
-            pred["_id"] = str(pred["_id"])
-            result.append(pred)
+        total_predictions = sum(risk_counts.values())
+        high_risk = risk_counts.get("High", 0)
+        moderate_risk = risk_counts.get("Moderate", 0)
         
-        return result
+        return {
+            "total_predictions": total_predictions,
+            "total_patients": patients[0]["count"] if patients else 0,
+            "high_risk_count": high_risk,
+            "moderate_risk_count": moderate_risk,
+            # Anything that isn't High or Moderate has always been reported as Low
+            "low_risk_count": total_predictions - high_risk - moderate_risk
+        }
     
     except Exception as e:
         raise HTTPException(
             status_code=500,
-            detail=f"Failed to retrieve stroke predictions: {str(e)}"
+            detail=f"Failed to summarize stroke predictions: {str(e)}"
         )
 
+RISK_SUMMARY_ID = "risk_summary"
+RISK_RECONCILE_LEASE_ID = "risk_summary_reconcile"
+RISK_COUNTER_KEYS = ("total_predictions", "high_risk_count", "moderate_risk_count", "low_risk_count")
+# A prediction is inserted within this long of its created_at; batches older
+# than that (re-inserted after an outage) are "late" writes
+RISK_STATS_SETTLE_SECONDS = 300
+RECONCILE_ATTEMPTS = 20
 
+def is_late_batch(documents: List[Dict[str, Any]], now: datetime) -> bool:
+    cutoff = now - timedelta(seconds=RISK_STATS_SETTLE_SECONDS)
+    return any(doc["created_at"].replace(tzinfo=None) < cutoff for doc in documents)
 
+def begin_risk_stats_write(documents: List[Dict[str, Any]]) -> Optional[str]:
+    """
+    Register a prediction batch as in flight before it is inserted
+    
+    reconcile_risk_stats only applies a correction while no batch is in
+    flight, so no prediction is counted by both the reconcile and its own $inc.
+    
+    Args:
+        documents: Documents about to be inserted
+    
+    Returns:
+        str: Token to pass to increment_risk_stats, or None if the stats are unavailable
+    """
+    if stats_collection is None or not documents:
+        return None
+    
+    now = datetime.utcnow()
+    token = str(ObjectId())
+    update = {"$set": {f"in_flight.{token}": now}, "$inc": {"seq": 1}}
+    if is_late_batch(documents, now):
+        update["$inc"]["late_writes"] = 1
+    
+    try:
+        stats_collection.update_one({"_id": RISK_SUMMARY_ID}, update, upsert=True)
+        return token
+    except Exception as e:
+        print(f"Warning: Failed to register prediction batch in risk statistics: {str(e)}")
+        return None
+
+def increment_risk_stats(documents: List[Dict[str, Any]], token: Optional[str] = None) -> None:
+    """
+    Fold newly inserted predictions into the pre-aggregated dashboard counters
+    
+    New patients are upserted with one unordered bulk_write and the counters
+    are bumped with one atomic $inc, which also clears the batch's in-flight
+    token. A failure here never fails the save itself; reconcile_risk_stats
+    repairs any drift.
+    
+    Args:
+        documents: Stroke prediction documents that were just inserted
+        token: Token from begin_risk_stats_write for this batch
+    """
+    if stats_collection is None or patients_collection is None or (not documents and token is None):
+        return
+    
+    try:
+        now = datetime.utcnow()
+        update = {"$inc": {"seq": 1}, "$set": {"updated_at": now}}
+        if token is not None:
+            update["$unset"] = {f"in_flight.{token}": ""}
+        
+        if documents:
+            high_risk = sum(1 for doc in documents if doc["prediction"]["risk_level"] == "High")
+            moderate_risk = sum(1 for doc in documents if doc["prediction"]["risk_level"] == "Moderate")
+            
+            user_ids = {doc.get("user_id") for doc in documents if doc.get("user_id") is not None}
+            new_patients = 0
+            if user_ids:
+                upserts = [
+                    UpdateOne({"_id": user_id}, {"$setOnInsert": {"first_prediction_at": now}}, upsert=True)
+                    for user_id in user_ids
+                ]
+                try:
+                    new_patients = patients_collection.bulk_write(upserts, ordered=False).upserted_count
+                except BulkWriteError as e:
+                    # A concurrent batch upserted the same patient first; it counted them
+                    if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                        raise
+                    new_patients = e.details.get("nUpserted", 0)
+            
+            update["$inc"].update({
+                "total_predictions": len(documents),
+                "total_patients": new_patients,
+                "high_risk_count": high_risk,
+                "moderate_risk_count": moderate_risk,
+                "low_risk_count": len(documents) - high_risk - moderate_risk
+            })
+            if token is not None and is_late_batch(documents, now):
+                update["$inc"]["late_writes"] = 1
+        
+        stats_collection.update_one({"_id": RISK_SUMMARY_ID}, update, upsert=True)
+    except Exception as e:
+        print(f"Warning: Failed to update risk statistics: {str(e)}")
+
+def count_risk_levels(query: Dict[str, Any]) -> Dict[str, int]:
+    """Count the predictions matching query per risk level"""
+    rows = stroke_collection.aggregate([
+        {"$match": query},
+        {"$group": {"_id": "$prediction.risk_level", "count": {"$sum": 1}}}
+    ])
+    risk_counts = {row["_id"]: row["count"] for row in rows}
+    
+    total_predictions = sum(risk_counts.values())
+    high_risk = risk_counts.get("High", 0)
+    moderate_risk = risk_counts.get("Moderate", 0)
+    return {
+        "total_predictions": total_predictions,
+        "high_risk_count": high_risk,
+        "moderate_risk_count": moderate_risk,
+        "low_risk_count": total_predictions - high_risk - moderate_risk
+    }
+
+def claim_reconcile_lease(duration: float) -> bool:
+    """
+    Claim the reconcile job for duration seconds, so one worker runs it per interval
+    
+    Returns:
+        bool: True if this process holds the lease
+    """
+    if stats_collection is None:
+        return False
+    
+    now = datetime.utcnow()
+    try:
+        stats_collection.update_one(
+            {"_id": RISK_RECONCILE_LEASE_ID, "expires_at": {"$lte": now}},
+            {"$set": {"expires_at": now + timedelta(seconds=duration), "holder": os.getpid()}},
+            upsert=True
+        )
+        return True
+    except DuplicateKeyError:
+        return False
+
+def reconcile_risk_stats() -> Optional[Dict[str, int]]:
+    """
+    Recompute the dashboard counters from stroke_data and correct the stored ones by the difference
+    
+    Predictions created before a watermark (RISK_STATS_SETTLE_SECONDS ago)
+    no longer change, so they are counted with one unhurried aggregation.
+    The recent tail, the patient count and the stored counters are then read
+    while no batch is in flight, and the difference is applied with $inc
+    guarded on the counters' seq: an increment landing in between makes the
+    attempt retry instead of being overwritten. A late batch written across
+    the watermark aborts the run; the next one picks it up.
+    
+    Returns:
+        dict: The reconciled summary, or None if live writes kept it from applying
+    """
+    if stats_collection is None or patients_collection is None:
+        raise HTTPException(
+            status_code=500,
+            detail="MongoDB connection not available"
+        )
+    
+    late_writes = (stats_collection.find_one({"_id": RISK_SUMMARY_ID}) or {}).get("late_writes")
+    watermark = datetime.utcnow() - timedelta(seconds=RISK_STATS_SETTLE_SECONDS)
+    settled = count_risk_levels({"created_at": {"$lt": watermark}})
+    
+    stroke_collection.aggregate([
+        {"$match": {"user_id": {"$ne": None}}},
+        {"$group": {"_id": "$user_id", "first_prediction_at": {"$min": "$created_at"}}},
+        {"$merge": {"into": patients_collection.name, "whenMatched": "keepExisting"}}
+    ])
+    
+    for _ in range(RECONCILE_ATTEMPTS):
+        stats = stats_collection.find_one({"_id": RISK_SUMMARY_ID}) or {}
+        if stats.get("late_writes") != late_writes:
+            print("Warning: Late predictions were written during reconciliation; retrying next run")
+            return None
+        
+        # A token older than the settle window belongs to a writer that died mid-batch
+        stale_before = datetime.utcnow() - timedelta(seconds=RISK_STATS_SETTLE_SECONDS)
+        if any(started >= stale_before for started in (stats.get("in_flight") or {}).values()):
+            time.sleep(0.05)
+            continue
+        
+        recent = count_risk_levels({"created_at": {"$gte": watermark}})
+        summary = {key: settled[key] + recent[key] for key in RISK_COUNTER_KEYS}
+        summary["total_patients"] = patients_collection.count_documents({})
+        
+        # $exists rather than None, which an upsert would seed into the new document
+        guard = {"_id": RISK_SUMMARY_ID}
+        guard["seq"] = stats["seq"] if "seq" in stats else {"$exists": False}
+        guard["late_writes"] = late_writes if late_writes is not None else {"$exists": False}
+        
+        now = datetime.utcnow()
+        try:
+            result = stats_collection.update_one(
+                guard,
+                {
+                    "$inc": {**{key: summary[key] - stats.get(key, 0) for key in summary}, "seq": 1},
+                    "$set": {"in_flight": {}, "updated_at": now, "reconciled_at": now}
+                },
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # The counters document was created or changed concurrently
+            continue
+        if result.modified_count or result.upserted_id is not None:
+            return summary
+    
+    print("Warning: Risk statistics kept changing during reconciliation; retrying next run")
+    return None
+
+def get_cached_risk_summary() -> Dict[str, int]:
+    """
+    Read the pre-aggregated dashboard counters in O(1)
+    
+    Falls back to a full reconcile the first time, before any counters exist.
+    
+    Returns:
+        dict: total_predictions, total_patients, high_risk_count,
+              moderate_risk_count and low_risk_count
+    """
+    if stats_collection is None:
+        return get_risk_summary()
+    
+    try:
+        stats = stats_collection.find_one({"_id": RISK_SUMMARY_ID})
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to read risk statistics: {str(e)}"
+        )
+    
+    # Counters that were only ever incremented never saw the existing predictions
+    if stats is None or "reconciled_at" not in stats:
+        return reconcile_risk_stats() or get_risk_summary()
+    
+    return {
+        key: stats.get(key, 0)
+        for key in ("total_predictions", "total_patients", "high_risk_count",
+                    "moderate_risk_count", "low_risk_count")
+    }
@@ -0,0 +1,80 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import numpy as np
+from preprocess import PREPROCESS_VERSION, FEATURE_COLUMNS, DATASET_DTYPES
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_DIR = os.path.join(backend_dir, 'training_cache')
+
+def cache_key(dataset_path):
+    """Hash of the dataset bytes plus the preprocessing config; any change gives a new key"""
+    digest = hashlib.sha256()
+    with open(dataset_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    config = json.dumps({
+        'version': PREPROCESS_VERSION,
+        'features': FEATURE_COLUMNS,
+        'dtypes': DATASET_DTYPES
+    }, sort_keys=True)
+    digest.update(config.encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+def load_cached(key, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Load an encoded feature matrix from the cache
+
+    X and y are memory-mapped .npy files, so nothing is parsed or copied up front.
+
+    Returns:
+        tuple: (X, y, preprocessor), or None if the key isn't cached
+    """
+    entry_dir = os.path.join(cache_dir, key)
+    if not os.path.isdir(entry_dir):
+        return None
+    X = np.load(os.path.join(entry_dir, 'X.npy'), mmap_mode='r')
+    y = np.load(os.path.join(entry_dir, 'y.npy'), mmap_mode='r')
+    with open(os.path.join(entry_dir, 'preprocessor.pkl'), 'rb') as f:
+        preprocessor = pickle.load(f)
+    return X, y, preprocessor
+
+def save_cached(key, X, y, preprocessor, cache_dir=DEFAULT_CACHE_DIR):
+    """Write a cache entry into a temp directory and rename it into place"""
+    entry_dir = os.path.join(cache_dir, key)
+    tmp_dir = f"{entry_dir}.tmp-{os.getpid()}"
+    os.makedirs(tmp_dir, exist_ok=True)
+    try:
+        np.save(os.path.join(tmp_dir, 'X.npy'), X)
+        np.save(os.path.join(tmp_dir, 'y.npy'), y)
+        with open(os.path.join(tmp_dir, 'preprocessor.pkl'), 'wb') as f:
+            pickle.dump(preprocessor, f)
+        os.rename(tmp_dir, entry_dir)
+    except OSError:
+        # Another run cached the same key first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if not os.path.isdir(entry_dir):
+            raise
+
+def load_or_build(dataset_path, build, cache_dir=DEFAULT_CACHE_DIR, key=None):
+    """
+    Return (X, y, preprocessor) for a dataset, building and caching it on a miss
+
+    Args:
+        dataset_path: Source CSV
+        build: Callable returning (X, y, preprocessor) from the CSV
+        cache_dir: Directory holding one subdirectory per cache key
+        key: Precomputed cache_key(dataset_path)
+    """
+    key = key or cache_key(dataset_path)
+    cached = load_cached(key, cache_dir)
+    if cached is not None:
+        print(f"Using cached training matrix {key}")
+        return cached
+
+    X, y, preprocessor = build(dataset_path)
+    save_cached(key, X, y, preprocessor, cache_dir)
+    print(f"Cached training matrix {key}")
+    return X, y, preprocessor
@@ -0,0 +1,157 @@
+import itertools
+import os
+import random
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import StratifiedKFold, train_test_split
+from sklearn.metrics import precision_score, recall_score, f1_score
+from imblearn.over_sampling import SMOTE
+from training_cache import DEFAULT_CACHE_DIR, load_cached
+
+PARAM_GRID = {
+    'max_depth': [6, 10, 14, None],
+    'min_samples_split': [2, 5, 10],
+    'min_samples_leaf': [1, 2, 4],
+    'max_features': ['sqrt', 0.5],
+}
+# Minority/majority ratio after oversampling; the raw data is about 0.05
+SMOTE_RATIOS = [0.25, 0.5, 1.0]
+
+TEST_SIZE = 0.2
+RANDOM_STATE = 42
+
+def build_configs(max_configs=None, random_state=RANDOM_STATE):
+    """Every RF hyperparameter / SMOTE ratio combination, optionally a random sample of them"""
+    keys = list(PARAM_GRID)
+    configs = [
+        {**dict(zip(keys, values)), 'smote_ratio': ratio}
+        for values in itertools.product(*(PARAM_GRID[key] for key in keys))
+        for ratio in SMOTE_RATIOS
+    ]
+    if max_configs and max_configs < len(configs):
+        configs = random.Random(random_state).sample(configs, max_configs)
+    return configs
+
+def load_fold_assignment(key, y, n_folds, random_state=RANDOM_STATE, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Fold number per row, cached next to the training matrix
+
+    Rows in the hold-out test split (the same one model.py evaluates on) are
+    -1 so the search never sees them; the rest are split with StratifiedKFold.
+    """
+    path = os.path.join(cache_dir, key, f'folds_k{n_folds}_seed{random_state}.npy')
+    if os.path.exists(path):
+        return np.load(path)
+
+    indices = np.arange(len(y))
+    train_idx, _ = train_test_split(indices, test_size=TEST_SIZE, random_state=random_state, stratify=y)
+
+    folds = np.full(len(y), -1, dtype=np.int8)
+    skf = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=random_state)
+    for fold, (_, val_idx) in enumerate(skf.split(train_idx, y[train_idx])):
+        folds[train_idx[val_idx]] = fold
+
+    np.save(path, folds)
+    return folds
+
+_worker_data = None
+
+def _init_worker(key, n_folds, random_state, cache_dir):
+    # Each worker memory-maps the cached matrix instead of receiving a pickled copy
+    global _worker_data
+    X, y, _ = load_cached(key, cache_dir)
+    folds = np.load(os.path.join(cache_dir, key, f'folds_k{n_folds}_seed{random_state}.npy'))
+    _worker_data = (X, y, folds)
+
+def evaluate_fold(config, n_estimators, fold, threshold, random_state=RANDOM_STATE):
+    """Fit one config on one fold (SMOTE applied to that fold's training rows only) and score it"""
+    X, y, folds = _worker_data
+    train = (folds >= 0) & (folds != fold)
+    val = folds == fold
+
+    start = time.perf_counter()
+    smote = SMOTE(sampling_strategy=config['smote_ratio'], random_state=random_state)
+    X_train, y_train = smote.fit_resample(X[train], y[train])
+
+    params = {name: value for name, value in config.items() if name != 'smote_ratio'}
+    model = RandomForestClassifier(n_estimators=n_estimators, random_state=random_state, n_jobs=1, **params)
+    model.fit(X_train, y_train)
+
+    y_pred = (model.predict_proba(X[val])[:, 1] > threshold).astype(int)
+    return {
+        'recall': recall_score(y[val], y_pred, zero_division=0),
+        'precision': precision_score(y[val], y_pred, zero_division=0),
+        'f1_score': f1_score(y[val], y_pred, zero_division=0),
+        'seconds': time.perf_counter() - start
+    }
+
+def format_config(config):
+    return ', '.join(f"{name}={value}" for name, value in config.items())
+
+def successive_halving(
+    key,
+    y,
+    n_folds=5,
+    threshold=0.5,
+    metric='f1_score',
+    min_estimators=25,
+    max_estimators=200,
+    eta=3,
+    max_configs=None,
+    workers=None,
+    random_state=RANDOM_STATE,
+    cache_dir=DEFAULT_CACHE_DIR
+):
+    """
+    Stratified k-fold successive-halving search over RF hyperparameters and SMOTE ratios
+
+    Every round scores all surviving configs with n_estimators trees across
+    the folds in a process pool, keeps the best 1/eta by mean metric at the
+    given threshold, and multiplies the tree budget by eta for the next round.
+
+    Returns:
+        dict: config, n_estimators, mean fold metrics and seconds of the winner
+    """
+    load_fold_assignment(key, y, n_folds, random_state, cache_dir)
+    candidates = build_configs(max_configs, random_state)
+    n_estimators = min_estimators
+    workers = workers or os.cpu_count()
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(key, n_folds, random_state, cache_dir)
+    ) as executor:
+        while True:
+            round_start = time.perf_counter()
+            futures = [
+                [executor.submit(evaluate_fold, config, n_estimators, fold, threshold, random_state)
+                 for fold in range(n_folds)]
+                for config in candidates
+            ]
+
+            results = []
+            for config, config_futures in zip(candidates, futures):
+                fold_scores = [future.result() for future in config_futures]
+                results.append({
+                    'config': config,
+                    'n_estimators': n_estimators,
+                    **{name: float(np.mean([score[name] for score in fold_scores]))
+                       for name in ('recall', 'precision', 'f1_score')},
+                    'seconds': float(np.sum([score['seconds'] for score in fold_scores]))
+                })
+            results.sort(key=lambda result: (result[metric], result['f1_score']), reverse=True)
+
+            print(f"\nRound: {len(candidates)} configs x {n_folds} folds, "
+                  f"{n_estimators} trees, {time.perf_counter() - round_start:.1f}s wall")
+            for result in results[:10]:
+                print(f"  recall={result['recall']:.4f} precision={result['precision']:.4f} "
+                      f"f1={result['f1_score']:.4f} time={result['seconds']:.2f}s  {format_config(result['config'])}")
+
+            if n_estimators >= max_estimators or len(candidates) == 1:
+                return results[0]
+
+            candidates = [result['config'] for result in results[:max(1, len(candidates) // eta)]]
+            n_estimators = min(n_estimators * eta, max_estimators)
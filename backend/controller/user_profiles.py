@@ -0,0 +1,50 @@
+import os
+from dotenv import load_dotenv
+from sqlalchemy import text, bindparam
+from .cache import TTLCache
+
+load_dotenv()
+
+USER_LOOKUP_CHUNK_SIZE = 500
+
+user_profile_cache = TTLCache(
+    maxsize=int(os.getenv('user_cache_size') or 10000),
+    ttl=float(os.getenv('user_cache_ttl') or 600)
+)
+
+get_users_query = text(
+    "SELECT id, name, email, role FROM users WHERE id IN :ids"
+).bindparams(bindparam('ids', expanding=True))
+
+def get_user_profiles(db, user_ids) -> dict:
+    """
+    Resolve user ids to {'name', 'email', 'role'}, hitting MySQL only for ids not in the cache
+
+    Misses are fetched in bounded chunks, so the query size never grows with
+    the prediction history. Unknown ids are left out of the result.
+    """
+    profiles = {}
+    missing = []
+    for user_id in set(user_ids):
+        profile = user_profile_cache.get(user_id)
+        if profile is None:
+            missing.append(user_id)
+        else:
+            profiles[user_id] = profile
+
+    for start in range(0, len(missing), USER_LOOKUP_CHUNK_SIZE):
+        chunk = missing[start:start + USER_LOOKUP_CHUNK_SIZE]
+        for user in db.execute(get_users_query, {'ids': chunk}).fetchall():
+            profile = {'name': user.name, 'email': user.email, 'role': user.role}
+            user_profile_cache.set(user.id, profile)
+            profiles[user.id] = profile
+
+    return profiles
+
+def get_user_names(db, user_ids) -> dict:
+    """Resolve user ids to names through the profile cache"""
+    return {user_id: profile['name'] for user_id, profile in get_user_profiles(db, user_ids).items()}
+
+def invalidate_user(user_id):
+    """Drop a cached profile after signup or a profile change"""
+    user_profile_cache.pop(user_id)
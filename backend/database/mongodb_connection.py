@@ -1,4 +1,4 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, IndexModel, ASCENDING, DESCENDING
 from pymongo.errors import ConnectionFailure
 from dotenv import load_dotenv
 import os
@@ -20,9 +20,53 @@ try:
     client.admin.command('ping')
     db = client[MONGODB_DB_NAME]
     stroke_collection = db["stroke_data"]
+    # Pre-aggregated dashboard counters and the set of users that have predictions
+    stats_collection = db["stroke_stats"]
+    patients_collection = db["stroke_patients"]
 except Exception as e:
     print(f"MongoDB connection error: {e}")
     client = None
     db = None
     stroke_collection = None
+    stats_collection = None
+    patients_collection = None
 
+# Every hot stroke_data query filters on a prefix of one of these and sorts by
+# (created_at, _id); _id is the tie-breaker that keyset pagination relies on
+STROKE_INDEXES = [
+    IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+               name="user_id_created_at"),
+    IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)],
+               name="created_at"),
+    IndexModel([("prediction.risk_level", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+               name="risk_level_created_at"),
+    # Dashboard condition/age filters: equality fields first, then the sort, then
+    # the age range (ESR), so filtered pages never sort in memory or fetch to filter
+    IndexModel([("prediction.risk_level", ASCENDING), ("input_data.hypertension", ASCENDING),
+                ("input_data.heart_disease", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING),
+                ("input_data.age", ASCENDING)],
+               name="risk_conditions_created_at_age"),
+]
+
+def ensure_indexes(collection=None):
+    """Create the stroke_data indexes if they don't exist yet (idempotent)"""
+    collection = stroke_collection if collection is None else collection
+    if collection is None:
+        return []
+    return collection.create_indexes(STROKE_INDEXES)
+
+def verify_indexes(collection=None):
+    """Raise RuntimeError if any stroke_data index is missing, so hot queries never collection-scan"""
+    collection = stroke_collection if collection is None else collection
+    if collection is None:
+        return
+    existing = {
+        tuple((field, int(direction)) for field, direction in info["key"])
+        for info in collection.index_information().values()
+    }
+    missing = [
+        index.document["name"] for index in STROKE_INDEXES
+        if tuple((field, int(direction)) for field, direction in index.document["key"].items()) not in existing
+    ]
+    if missing:
+        raise RuntimeError(f"Missing MongoDB indexes on stroke_data: {', '.join(missing)}")
@@ -1,18 +1,78 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from pymysql.constants import CLIENT
 from dotenv import load_dotenv
+import threading
+import time
 import os
 
 load_dotenv()
 
 db_url = f'mysql+pymysql://{os.getenv("dbuser")}:{os.getenv("dbpassword")}@{os.getenv("dbhost")}:{os.getenv("dbport")}/{os.getenv("dbname")}'
 
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long callers wait to check out a connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            wait = time.perf_counter() - start
+            with self._stats_lock:
+                self.checkouts += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+
 engine = create_engine(
     db_url,
-    connect_args={"client_flag": CLIENT.MULTI_STATEMENTS}
+    connect_args={"client_flag": CLIENT.MULTI_STATEMENTS},
+    poolclass=TimedQueuePool,
+    pool_size=int(os.getenv("db_pool_size") or 10),
+    max_overflow=int(os.getenv("db_max_overflow") or 20),
+    pool_timeout=float(os.getenv("db_pool_timeout") or 10),
+    pool_recycle=int(os.getenv("db_pool_recycle") or 1800),
+    pool_pre_ping=True
 )
 
 Session = sessionmaker(bind=engine)
 
-db = Session()
\ No newline at end of file
+def get_db():
+    """FastAPI dependency: one session per request, returned to the pool afterwards"""
+    db = Session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_pool_stats() -> dict:
+    pool = engine.pool
+    with pool._stats_lock:
+        checkouts = pool.checkouts
+        total_wait = pool.total_wait
+        stats = {
+            'checkouts': checkouts,
+            'timeouts': pool.timeouts,
+            'avg_wait_ms': round(total_wait / checkouts * 1000, 3) if checkouts else 0.0,
+            'max_wait_ms': round(pool.max_wait * 1000, 3)
+        }
+    return {
+        'pool_size': pool.size(),
+        'checked_out': pool.checkedout(),
+        'checked_in': pool.checkedin(),
+        'overflow': max(pool.overflow(), 0),
+        **stats
+    }
@@ -0,0 +1,44 @@
+"""
+Gunicorn settings for the production server (started by serve.py).
+
+The master loads the model once before forking, so every worker starts with
+the same artifact in copy-on-write memory instead of reading its own copy.
+Workers re-check the file at startup and only load again if it changed.
+
+    kill -HUP <master pid>    graceful reload: new workers start, old ones finish their requests
+    kill -TERM <master pid>   graceful shutdown within graceful_timeout
+"""
+import multiprocessing
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+chdir = os.path.dirname(os.path.abspath(__file__))
+wsgi_app = 'server:app'
+worker_class = 'uvicorn_worker.UvicornWorker'
+bind = f"{os.getenv('host') or '0.0.0.0'}:{os.getenv('port') or 8080}"
+workers = int(os.getenv('web_workers') or multiprocessing.cpu_count())
+
+# Time a stopping worker gets to finish in-flight requests and flush queued predictions
+graceful_timeout = int(os.getenv('web_graceful_timeout') or 30)
+timeout = int(os.getenv('web_worker_timeout') or 60)
+keepalive = 5
+
+# Recycle each worker after this many requests, staggered by the jitter; 0 disables
+max_requests = int(os.getenv('web_max_requests') or 0)
+max_requests_jitter = max_requests // 10
+
+
+def on_starting(server):
+    from controller.model_registry import model_registry
+    try:
+        model_registry.load()
+    except Exception as e:
+        print(f"Warning: Model not preloaded in the master: {str(e)}")
+
+
+def on_reload(server):
+    # Replacement workers fork from the master, so refresh its copy first
+    from controller.model_registry import model_registry
+    model_registry.check_for_update()
@@ -1,156 +1,190 @@
 import pandas as pd
 import sys
 import os
-import bcrypt
+import json
+import time
+import hashlib
+import argparse
 from datetime import datetime
-from sqlalchemy import text
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+from sqlalchemy import text, bindparam
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from database.connection import db
+from database.mySql_connection import engine
 from database.mongodb_connection import stroke_collection
+from controller.stroke_data_service import build_stroke_document, reconcile_risk_stats
+from controller.preprocess import read_dataset_chunks
+from controller.passwords import hash_password
 
-def create_user(gender, age, row_id):
-    """Create a user in MySQL and return the user ID"""
-    try:
-        email = f"patient_{row_id}@strokeapp.com"
-        name = f"Patient {row_id}"
-        
-        default_password = "Patient123!"
-        salt = bcrypt.gensalt()
-        hashed_password = bcrypt.hashpw(default_password.encode('utf-8'), salt).decode('utf-8')
-        
-        gender_mapped = gender.lower() if gender.lower() in ['male', 'female'] else 'male'
-        
-        current_year = datetime.now().year
-        birth_year = current_year - int(age)
-        dob = f"{birth_year}-01-01"
-        
-        check_user_query = text("SELECT id FROM users WHERE email = :email")
-        existing_user = db.execute(check_user_query, {'email': email}).fetchone()
-        
-        if existing_user:
-            return existing_user.id
-        
-        insert_user_query = text("""
-            INSERT INTO users (name, email, password, role, phoneNumber, DOB, gender)
-            VALUES (:name, :email, :password, :role, :phoneNumber, :DOB, :gender)
-        """)
-        
-        result = db.execute(insert_user_query, {
-            'name': name,
-            'email': email,
-            'password': hashed_password,
-            'role': 'patient',
-            'phoneNumber': None,
-            'DOB': dob,
-            'gender': gender_mapped
-        })
-        db.commit()
-        
-        get_user_query = text("SELECT id FROM users WHERE email = :email")
-        user = db.execute(get_user_query, {'email': email}).fetchone()
-        
-        return user.id
-    
-    except Exception as e:
-        db.rollback()
-        print(f"Error creating user for row {row_id}: {e}")
-        return None
+DEFAULT_PASSWORD = "Patient123!"
+DEFAULT_CHUNK_SIZE = 500
+PROGRESS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'seed_progress.json')
 
-def save_stroke_data_to_mongodb(user_id, user_email, row_data, stroke_result):
-    """Save stroke data to MongoDB"""
-    try:
-        if stroke_collection is None:
-            print(f"Warning: MongoDB not connected. Skipping row {row_data.get('id')}")
-            return False
-        
-        bmi = row_data.get('bmi')
-        if bmi == 'N/A' or pd.isna(bmi):
+# INSERT IGNORE keeps a resumed chunk from failing on users it already created
+insert_users_query = text("""
+    INSERT IGNORE INTO users (name, email, password, role, phoneNumber, DOB, gender)
+    VALUES (:name, :email, :password, :role, :phoneNumber, :DOB, :gender)
+""")
+
+get_user_ids_query = text(
+    "SELECT id, email FROM users WHERE email IN :emails"
+).bindparams(bindparam('emails', expanding=True))
+
+def seed_email(row_id):
+    return f"patient_{row_id}@strokeapp.com"
+
+def seed_document_id(row_id):
+    """Deterministic ObjectId per CSV row, so re-inserting a chunk can't duplicate documents"""
+    return ObjectId(hashlib.md5(f"seed:{row_id}".encode('utf-8')).digest()[:12])
+
+def build_user_params(row, hashed_password, current_year):
+    gender = str(row.get('gender', 'Male'))
+    age = row.get('age', 50)
+    return {
+        'name': f"Patient {row['id']}",
+        'email': seed_email(row['id']),
+        'password': hashed_password,
+        'role': 'patient',
+        'phoneNumber': None,
+        'DOB': f"{current_year - int(age)}-01-01",
+        'gender': gender.lower() if gender.lower() in ['male', 'female'] else 'male'
+    }
+
+def build_seed_document(user_id, row):
+    """Build the stroke_data document for one CSV row"""
+    bmi = row.get('bmi')
+    if bmi is None or bmi == 'N/A' or pd.isna(bmi):
+        bmi = None
+    else:
+        try:
+            bmi = float(bmi)
+        except (ValueError, TypeError):
             bmi = None
-        else:
-            try:
-                bmi = float(bmi)
-            except (ValueError, TypeError):
-                bmi = None
-        
-        stroke_document = {
-            "user_id": user_id,
-            "user_email": user_email,
-            "input_data": {
-                "gender": row_data.get('gender'),
-                "age": float(row_data.get('age')),
-                "hypertension": int(row_data.get('hypertension')),
-                "heart_disease": int(row_data.get('heart_disease')),
-                "ever_married": row_data.get('ever_married'),
-                "work_type": row_data.get('work_type'),
-                "Residence_type": row_data.get('Residence_type'),
-                "avg_glucose_level": float(row_data.get('avg_glucose_level')),
-                "bmi": bmi,
-                "smoking_status": row_data.get('smoking_status')
-            },
-            "prediction": {
-                "result": int(stroke_result),
-                "probability": 1.0 if stroke_result == 1 else 0.0,
-                "risk_level": "High" if stroke_result == 1 else "Low"
-            },
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
+
+    stroke_result = int(row.get('stroke', 0))
+    input_data = {
+        "gender": row.get('gender'),
+        "age": float(row.get('age')),
+        "hypertension": int(row.get('hypertension')),
+        "heart_disease": int(row.get('heart_disease')),
+        "ever_married": row.get('ever_married'),
+        "work_type": row.get('work_type'),
+        "Residence_type": row.get('Residence_type'),
+        "avg_glucose_level": float(row.get('avg_glucose_level')),
+        "bmi": bmi,
+        "smoking_status": row.get('smoking_status')
+    }
+
+    document = build_stroke_document(
+        user_id,
+        seed_email(row['id']),
+        input_data,
+        stroke_result,
+        1.0 if stroke_result == 1 else 0.0,
+        "High" if stroke_result == 1 else "Low"
+    )
+    document["_id"] = seed_document_id(row['id'])
+    return document
+
+def seed_chunk(rows, hashed_password):
+    """
+    Seed one chunk: users in one transaction, then their documents in one insert_many
+
+    Returns:
+        int: Number of stroke documents written
+    """
+    current_year = datetime.now().year
+    users = [build_user_params(row, hashed_password, current_year) for row in rows]
+
+    with engine.begin() as conn:
+        conn.execute(insert_users_query, users)
+        user_ids = {
+            user.email: user.id
+            for user in conn.execute(get_user_ids_query, {'emails': [user['email'] for user in users]})
         }
-        
-        stroke_collection.insert_one(stroke_document)
-        return True
-    
-    except Exception as e:
-        print(f"Error saving stroke data to MongoDB for row {row_data.get('id')}: {e}")
-        return False
 
-def seed_data(csv_path):
-    """Main function to seed data from CSV"""
+    documents = [
+        build_seed_document(user_ids[seed_email(row['id'])], row)
+        for row in rows
+        if seed_email(row['id']) in user_ids
+    ]
+    if not documents:
+        return 0
+
     try:
-        print(f"Reading CSV file: {csv_path}")
-        df = pd.read_csv(csv_path)
-        
-        print(f"Found {len(df)} rows to process")
-        
-        success_count = 0
-        error_count = 0
-        
-        for index, row in df.iterrows():
-            try:
-                row_id = row.get('id', index)
-                gender = row.get('gender', 'Male')
-                age = row.get('age', 50)
-                stroke_result = int(row.get('stroke', 0))
-                
-                user_id = create_user(gender, age, row_id)
-                
-                if user_id is None:
-                    error_count += 1
-                    print(f"Failed to create user for row {row_id}")
-                    continue
-                
-                user_email = f"patient_{row_id}@strokeapp.com"
-                
-                if save_stroke_data_to_mongodb(user_id, user_email, row, stroke_result):
-                    success_count += 1
-                    if (index + 1) % 100 == 0:
-                        print(f"Processed {index + 1} rows...")
-                else:
-                    error_count += 1
-                    
-            except Exception as e:
-                error_count += 1
-                continue
-        
+        stroke_collection.insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        # Duplicate keys mean the documents were written by an interrupted run
+        errors = [error for error in e.details.get('writeErrors', []) if error.get('code') != 11000]
+        if errors:
+            raise
+    return len(documents)
+
+def source_fingerprint(csv_path):
+    stat = os.stat(csv_path)
+    return {'csv_path': os.path.abspath(csv_path), 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+def load_progress(csv_path):
+    """Rows already committed for this exact CSV file, or 0"""
+    if not os.path.exists(PROGRESS_PATH):
+        return 0
+    with open(PROGRESS_PATH) as f:
+        progress = json.load(f)
+    if progress.get('source') != source_fingerprint(csv_path):
+        return 0
+    return progress.get('rows_committed', 0)
+
+def save_progress(csv_path, rows_committed):
+    tmp_path = f"{PROGRESS_PATH}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({'source': source_fingerprint(csv_path), 'rows_committed': rows_committed}, f)
+    os.replace(tmp_path, PROGRESS_PATH)
+
+def seed_data(csv_path, chunk_size=DEFAULT_CHUNK_SIZE, resume=True):
+    """Main function to seed data from CSV in bulk chunks"""
+    try:
+        if stroke_collection is None:
+            print("Error: MongoDB not connected")
+            return
+
+        start_row = load_progress(csv_path) if resume else 0
+        print(f"Streaming CSV file: {csv_path}, starting at row {start_row}")
+
+        # Every seeded patient shares the default password, so hash it once
+        hashed_password = hash_password(DEFAULT_PASSWORD)
+
+        started = time.perf_counter()
+        seeded = 0
+        rows_committed = start_row
+        for chunk in read_dataset_chunks(csv_path, chunk_size, skip_rows=start_row):
+            if 'id' not in chunk.columns:
+                chunk['id'] = range(rows_committed, rows_committed + len(chunk))
+            rows = chunk.astype(object).where(chunk.notna(), None).to_dict('records')
+            seeded += seed_chunk(rows, hashed_password)
+
+            rows_committed += len(rows)
+            save_progress(csv_path, rows_committed)
+
+            elapsed = time.perf_counter() - started
+            print(f"Processed {rows_committed} rows "
+                  f"({seeded / elapsed:.0f} rows/s)")
+
+        elapsed = time.perf_counter() - started
+        print(f"Seeded {seeded} rows in {elapsed:.1f}s")
+
+        reconcile_risk_stats()
+
     except FileNotFoundError:
         print(f"Error: CSV file not found at {csv_path}")
     except Exception as e:
-        print(f"Error reading CSV file: {e}")
+        print(f"Error seeding data: {e}")
 
 if __name__ == "__main__":
-    csv_path = r"C:\Users\HomePC\Documents\stroke_data.csv"
-    seed_data(csv_path)
-
-
-
+    parser = argparse.ArgumentParser(description="Seed users and stroke data from a CSV file")
+    parser.add_argument('csv_path', nargs='?', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dataset.csv'))
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--no-resume', action='store_true', help="Ignore saved progress and start from the first row")
+    args = parser.parse_args()
+    seed_data(args.csv_path, chunk_size=args.chunk_size, resume=not args.no_resume)
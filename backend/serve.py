@@ -0,0 +1,17 @@
+"""
+Production entry point: multiple uvicorn workers under gunicorn.
+
+    python serve.py                       # web_workers workers (default: CPU count)
+    python serve.py --workers 4 --bind 127.0.0.1:8080
+
+Settings live in gunicorn.conf.py; extra arguments are passed to gunicorn.
+server.py keeps the single-process auto-reload server for development.
+"""
+import os
+import sys
+from gunicorn.app.wsgiapp import run
+
+if __name__ == "__main__":
+    config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gunicorn.conf.py')
+    sys.argv = ['gunicorn', '--config', config_path, *sys.argv[1:]]
+    run()
@@ -1,11 +1,54 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from controller.auth import api as auth_api
-from controller.prediction import api as prediction_api
+from controller.prediction import api as prediction_api, predict_batcher, prediction_cache
 from controller.dashboard import api as dashboard_api
+from controller.model_registry import model_registry
+from controller.prediction_writer import prediction_writer
+from controller.concurrency import run_blocking, shutdown_executor
+from controller.passwords import password_pool_stats, shutdown_password_pool
+from controller.stroke_data_service import claim_reconcile_lease, reconcile_risk_stats
+from controller.user_profiles import user_profile_cache
+from controller.jwt_auth import verified_token_cache
+from database.mySql_connection import get_pool_stats
+from database.mongodb_connection import ensure_indexes, verify_indexes
+import os
+from contextlib import asynccontextmanager, suppress
+import asyncio
 import uvicorn
 
-app = FastAPI(title="Stroke Prediction API", version="1.0.0")
+async def reconcile_stats_periodically(interval: float):
+    """Repair drift in the pre-aggregated dashboard counters every interval seconds"""
+    while True:
+        try:
+            # Every worker runs this loop; the lease lets one of them reconcile per interval
+            if await run_blocking(claim_reconcile_lease, interval):
+                await run_blocking(reconcile_risk_stats)
+        except Exception as e:
+            print(f"Warning: Risk statistics reconciliation failed: {str(e)}")
+        await asyncio.sleep(interval)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if (os.getenv("mongo_create_indexes") or "true").lower() == "true":
+        ensure_indexes()
+    verify_indexes()
+    model_registry.start()
+    prediction_writer.start()
+    reconcile_task = asyncio.create_task(
+        reconcile_stats_periodically(float(os.getenv("stats_reconcile_interval") or 3600))
+    )
+    yield
+    reconcile_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await reconcile_task
+    model_registry.stop()
+    # After the executor has no more submits in flight, write out what is still queued
+    shutdown_executor()
+    prediction_writer.stop()
+    shutdown_password_pool()
+
+app = FastAPI(title="Stroke Prediction API", version="1.0.0", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -20,7 +63,20 @@ app.include_router(dashboard_api)
 @app.get('/health')
 async def health_check():
     """Health check endpoint"""
-    return {'status': 'healthy', 'message': 'Server is running'}
+    return {'status': 'healthy', 'message': 'Server is running', 'model': model_registry.info()}
+
+@app.get('/metrics')
+async def metrics():
+    """Runtime metrics for the connection pool, caches and prediction pipeline"""
+    return {
+        'db_pool': get_pool_stats(),
+        'user_profile_cache': user_profile_cache.stats(),
+        'token_cache': verified_token_cache.stats(),
+        'prediction_writer': prediction_writer.stats(),
+        'predict_batcher': predict_batcher.stats(),
+        'prediction_cache': prediction_cache.stats(),
+        'password_pool': password_pool_stats()
+    }
 
 if __name__ == "__main__":
     uvicorn.run(
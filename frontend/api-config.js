@@ -7,10 +7,13 @@ const API_CONFIG = {
             SIGNIN: '/auth/signin'
         },
         PREDICTION: {
-            PREDICT: '/prediction/predict'
+            PREDICT: '/prediction/predict',
+            PREDICT_BATCH: '/prediction/predict/batch',
+            HISTORY: '/prediction/history'
         },
         DASHBOARD: {
-            PATIENTS: '/dashboard/patients'
+            PATIENTS: '/dashboard/patients',
+            PATIENT_HISTORY: (userId) => `/dashboard/patients/${userId}`
         },
         HEALTH: '/health'
     }
@@ -60,7 +60,7 @@ function setupLogout() {
     }
 }
 
-async function loadPatientData(page = 1) {
+async function loadPatientData(page = 1, cursor = null) {
     const loadingIndicator = document.getElementById('loadingIndicator');
     const patientsTable = document.getElementById('patientsTable');
     const noDataMessage = document.getElementById('noDataMessage');
@@ -74,7 +74,10 @@ async function loadPatientData(page = 1) {
     currentPage = page;
     
     try {
-        const url = `${getApiUrl(API_CONFIG.ENDPOINTS.DASHBOARD.PATIENTS)}?page=${page}&page_size=${pageSize}`;
+        let url = `${getApiUrl(API_CONFIG.ENDPOINTS.DASHBOARD.PATIENTS)}?page=${page}&page_size=${pageSize}`;
+        if (cursor) {
+            url += `&cursor=${encodeURIComponent(cursor)}`;
+        }
         const response = await apiCall(url);
         
         if (response.success && response.data.success) {
@@ -390,7 +393,7 @@ function setupPagination() {
     if (prevBtn) {
         prevBtn.addEventListener('click', function() {
             if (currentPage > 1) {
-                loadPatientData(currentPage - 1);
+                loadPatientData(currentPage - 1, paginationData.prev_cursor);
                 window.scrollTo({ top: 0, behavior: 'smooth' });
             }
         });
@@ -399,7 +402,7 @@ function setupPagination() {
     if (nextBtn) {
         nextBtn.addEventListener('click', function() {
             if (paginationData.has_next) {
-                loadPatientData(currentPage + 1);
+                loadPatientData(currentPage + 1, paginationData.next_cursor);
                 window.scrollTo({ top: 0, behavior: 'smooth' });
             }
         });